@@ -4,61 +4,209 @@ NHANES 数据读取和分析
 分析 PBCD_L (血铅、血镉、血汞等) 数据
 """
 
-import pandas as pd
+# pandas / pyarrow / pyreadstat 在函数内按需导入, 以缩短脚本启动时间
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 DATA_DIR = "nhanes_data"
 
+# 只读取下游分析使用的列 (Parquet 按列投影, 其余列不解码)
+LEAD_COLS = ['SEQN', 'LBXBPB', 'LBXBCD', 'LBXTHG', 'LBXBSE', 'LBXBMN']  # 铅、镉、汞、硒、锰
+DEMO_COLS = ['SEQN', 'RIDAGEYR', 'RIAGENDR', 'RIDRETH3']              # 年龄、性别、种族
+
+# NHANES XPT 的变量标签为 Windows-1252 编码
+XPT_ENCODING = "WINDOWS-1252"
+
+# 超过该大小的文件使用多进程解码
+MULTIPROCESS_MIN_BYTES = 50 * 1024 * 1024
+
+# Parquet 缓存中记录源文件 (路径, mtime, 大小) 的元数据键
+CACHE_KEY = b"nhanes_source"
+
+def read_xport(path):
+    """用 pyreadstat 读取 XPT 文件, 大文件多进程并行解码"""
+    import pyreadstat
+    
+    if os.path.getsize(path) >= MULTIPROCESS_MIN_BYTES:
+        # XPT 元数据不含行数, 以 文件大小/行宽 作为上界
+        _, meta = pyreadstat.read_xport(path, metadataonly=True, encoding=XPT_ENCODING)
+        row_width = sum(meta.variable_storage_width.values())
+        df, _ = pyreadstat.read_file_multiprocessing(
+            pyreadstat.read_xport, path, num_processes=os.cpu_count(),
+            num_rows=os.path.getsize(path) // row_width, encoding=XPT_ENCODING)
+    else:
+        df, _ = pyreadstat.read_xport(path, encoding=XPT_ENCODING)
+    return df
+
+def iter_xport_chunks(path, chunksize=100_000):
+    """按行分块读取 XPT 文件
+
+    pyreadstat.read_file_in_chunks 读取元数据时不传递 encoding,
+    对 NHANES 文件会解码失败, 因此直接用 row_offset/row_limit 分块。
+    """
+    import pyreadstat
+    
+    offset = 0
+    while True:
+        chunk, _ = pyreadstat.read_xport(path, row_offset=offset, row_limit=chunksize,
+                                         encoding=XPT_ENCODING)
+        # 首块即使为空也产出, 保证零行文件也能写出带 schema 的 Parquet
+        if len(chunk) or offset == 0:
+            yield chunk
+        if len(chunk) < chunksize:
+            return
+        offset += chunksize
+
+def write_parquet_chunks(chunks, parquet_path, source_key=None):
+    """将若干 DataFrame 块写成一个 Parquet 文件, schema 元数据记录源文件
+
+    先写入临时文件再原子替换, 中断的转换不会留下截断的缓存。
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    tmp_path = parquet_path + ".tmp"
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                if source_key is not None:
+                    schema = schema.with_metadata({**(schema.metadata or {}),
+                                                   CACHE_KEY: source_key.encode()})
+                writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+            writer.write_table(table)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    writer.close()
+    os.replace(tmp_path, parquet_path)
+    return parquet_path
+
+def xpt_to_parquet(xpt_path, parquet_path, chunksize=100_000, source_key=None):
+    """将 XPT 文件转换为 Parquet; 小文件分块流式写入, 大文件多进程解码"""
+    if os.path.getsize(xpt_path) >= MULTIPROCESS_MIN_BYTES:
+        chunks = [read_xport(xpt_path)]
+    else:
+        chunks = iter_xport_chunks(xpt_path, chunksize)
+    return write_parquet_chunks(chunks, parquet_path, source_key=source_key)
+
+def csv_to_parquet(csv_path, parquet_path, source_key=None):
+    """将 CSV 文件转换为 Parquet"""
+    import pandas as pd
+    
+    return write_parquet_chunks([pd.read_csv(csv_path)], parquet_path, source_key=source_key)
+
+def cached_parquet(src_path):
+    """返回 XPT/CSV 对应的 Parquet 缓存路径; 缓存缺失、损坏或源文件变化时重新转换"""
+    import pyarrow.parquet as pq
+    
+    parquet_path = os.path.splitext(src_path)[0] + ".parquet"
+    stat = os.stat(src_path)
+    source_key = f"{os.path.abspath(src_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+    
+    if os.path.exists(parquet_path):
+        try:
+            metadata = pq.read_schema(parquet_path).metadata or {}
+        except (OSError, ValueError):
+            metadata = {}  # 缓存损坏 (如旧版本中断写入), 视为未命中并重建
+        if metadata.get(CACHE_KEY) == source_key.encode():
+            return parquet_path
+    
+    if src_path.lower().endswith(".csv"):
+        return csv_to_parquet(src_path, parquet_path, source_key=source_key)
+    return xpt_to_parquet(src_path, parquet_path, source_key=source_key)
+
+def cached_read_xport(xpt_path, columns=None):
+    """读取 XPT 文件 (经 Parquet 缓存), 可只读取部分列"""
+    import pandas as pd
+    
+    return pd.read_parquet(cached_parquet(xpt_path), columns=columns)
+
+def downcast_numeric(df):
+    """float64 列降为 float32; 取值为小整数的编码列转为可空 Int16"""
+    import numpy as np
+    
+    dtypes = {}
+    for col in df.select_dtypes("float64").columns:
+        values = df[col].to_numpy()
+        values = values[~np.isnan(values)]
+        if (values.size and np.all(values == np.round(values))
+                and values.min() >= np.iinfo(np.int16).min
+                and values.max() <= np.iinfo(np.int16).max):
+            dtypes[col] = "Int16"
+        else:
+            dtypes[col] = "float32"
+    return df.astype(dtypes)
+
 def load_nhanes_data():
-    """加载NHANES数据"""
+    """加载NHANES数据 (三个文件并发读取)"""
+    import pyarrow.parquet as pq
     
-    # 加载血重金属数据 (最重要!)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        pbbcd_future = pool.submit(cached_parquet, f"{DATA_DIR}/PBCD_L.xpt")
+        demo_future = pool.submit(cached_read_xport, f"{DATA_DIR}/DEMO_L.xpt", DEMO_COLS)
+        mcq_future = pool.submit(cached_read_xport, f"{DATA_DIR}/MCQ_L.xpt")
+        pbbcd_path = pbbcd_future.result()
+        demo = downcast_numeric(demo_future.result())
+        mcq = downcast_numeric(mcq_future.result())
+    
+    # 血重金属数据 (最重要!)
     print("📂 加载血重金属数据 (PBCD_L)...")
-    pbbcd = pd.read_sas(f"{DATA_DIR}/PBCD_L.xpt")
-    print(f"   样本数: {len(pbbcd)}, 变量数: {len(pbbcd.columns)}")
-    print(f"   列名: {list(pbbcd.columns)}")
+    meta = pq.read_metadata(pbbcd_path)
+    print(f"   样本数: {meta.num_rows}, 变量数: {meta.num_columns}")
+    print(f"   列名: {meta.schema.names}")
     
-    # 加载人口统计数据
+    # 人口统计数据
+    # 变量数与 PBCD 一致取文件 schema 的列数 (demo 只读取了 DEMO_COLS)
     print("\n📂 加载人口统计数据 (DEMO_L)...")
-    demo = pd.read_sas(f"{DATA_DIR}/DEMO_L.xpt")
-    print(f"   样本数: {len(demo)}, 变量数: {len(demo.columns)}")
+    demo_schema = pq.read_schema(cached_parquet(f"{DATA_DIR}/DEMO_L.xpt"))
+    print(f"   样本数: {len(demo)}, 变量数: {len(demo_schema.names)}")
     
-    # 加载健康问卷
+    # 健康问卷
     print("\n📂 加载健康问卷 (MCQ_L)...")
-    mcq = pd.read_sas(f"{DATA_DIR}/MCQ_L.xpt")
     print(f"   样本数: {len(mcq)}, 变量数: {len(mcq.columns)}")
     
-    return pbbcd, demo, mcq
+    return pbbcd_path, demo, mcq
 
-def analyze_lead_data(pbbcd, demo):
-    """分析血铅数据"""
+def analyze_lead_data(pbbcd_path, demo):
+    """分析血铅数据 (仅物化铅/重金属相关列)"""
+    import pyarrow.dataset as ds
+    
     print("\n" + "="*60)
     print("🔬 血铅数据分析")
     print("="*60)
     
-    # 查找铅相关列
-    lead_cols = [c for c in pbbcd.columns if 'LBX' in c.upper() or 'LPB' in c.upper()]
-    print(f"\n铅/重金属相关列: {lead_cols}")
+    dataset = ds.dataset(pbbcd_path, format="parquet")
+    
+    # 铅/重金属相关列
+    print(f"\n铅/重金属相关列: {LEAD_COLS[1:]}")
     
-    # 显示数据描述
+    # 显示数据描述 (在 float64 原值上统计, 打印后再压缩存储)
+    lead = dataset.to_table(columns=LEAD_COLS).to_pandas()
     print("\n数据统计:")
-    print(pbbcd[lead_cols].describe())
+    print(lead[LEAD_COLS[1:]].describe())
     
-    return pbbcd
+    return downcast_numeric(lead)
 
 def main():
     print("="*60)
     print("📊 NHANES 2021-2023 数据探索")
     print("="*60)
     
-    pbbcd, demo, mcq = load_nhanes_data()
-    analyze_lead_data(pbbcd, demo)
+    pbbcd_path, demo, mcq = load_nhanes_data()
+    analyze_lead_data(pbbcd_path, demo)
     
     # 保存血铅数据为CSV
     output_dir = "output"
     os.makedirs(output_dir, exist_ok=True)
     
-    pbbcd.to_csv(f"{output_dir}/nhanes_lead_blood.csv", index=False)
+    import pandas as pd
+    pd.read_parquet(pbbcd_path).to_csv(f"{output_dir}/nhanes_lead_blood.csv", index=False)
     print(f"\n✅ 血铅数据已保存到: {output_dir}/nhanes_lead_blood.csv")
 
 if __name__ == "__main__":
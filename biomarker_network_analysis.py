@@ -287,36 +287,41 @@ def plot_interactive_network(G, corr_matrix, metrics, communities, output_path):
     # 准备边数据
     edge_x = []
     edge_y = []
-    edge_weights = []
     edge_colors = []
     
     for edge in G.edges():
         x0, y0 = pos[edge[0]]
         x1, y1 = pos[edge[1]]
-        edge_x.extend([x0, x1, None])
-        edge_y.extend([y0, y1, None])
-        
-        corr = G[edge[0]][edge[1]]['correlation']
-        edge_weights.append(abs(corr))
-        edge_colors.append(corr)
+        edge_x.append((x0, x1))
+        edge_y.append((y0, y1))
+        edge_colors.append(G[edge[0]][edge[1]]['correlation'])
+    
+    edge_x = np.asarray(edge_x, dtype=float).reshape(-1, 2)
+    edge_y = np.asarray(edge_y, dtype=float).reshape(-1, 2)
+    edge_colors = np.asarray(edge_colors, dtype=float)
+    edge_weights = np.abs(edge_colors)
     
     # 创建图形
     fig = go.Figure()
     
-    # 添加边 - 简化颜色处理
-    for i in range(0, len(edge_x), 3):
-        corr_val = edge_colors[i//3]
-        edge_color = 'rgba(231, 76, 60, 0.5)' if corr_val > 0 else 'rgba(52, 152, 219, 0.5)'
-        fig.add_trace(go.Scatter(
-            x=[edge_x[i], edge_x[i+1]],
-            y=[edge_y[i], edge_y[i+1]],
-            mode='lines',
-            line=dict(width=edge_weights[i//3] * 3, 
-                     color=edge_color),
-            hoverinfo='text',
-            text=f"Correlation: {corr_val:.3f}",
-            showlegend=False
-        ))
+    # 添加边 - 按正/负相关和线宽分桶，每桶一条以 None 分隔的折线
+    width_bucket = np.digitize(edge_weights, [0.25, 0.4, 0.6])
+    for positive, color in ((True, 'rgba(231, 76, 60, 0.5)'), (False, 'rgba(52, 152, 219, 0.5)')):
+        for bucket in range(4):
+            idx = np.flatnonzero(((edge_colors > 0) == positive) & (width_bucket == bucket))
+            if idx.size == 0:
+                continue
+            nones = np.full((idx.size, 1), None, dtype=object)
+            hover = np.char.mod('Correlation: %.3f', edge_colors[idx]).astype(object)[:, None]
+            fig.add_trace(go.Scatter(
+                x=np.hstack([edge_x[idx].astype(object), nones]).ravel(),
+                y=np.hstack([edge_y[idx].astype(object), nones]).ravel(),
+                mode='lines',
+                line=dict(width=edge_weights[idx].mean() * 3, color=color),
+                hoverinfo='text',
+                hovertext=np.hstack([hover, hover, nones]).ravel(),
+                showlegend=False
+            ))
     
     # 添加节点
     fig.add_trace(go.Scatter(
@@ -418,15 +423,10 @@ def plot_community_network(G, communities, output_path):
         
         # 为每个社区分配颜色
         colors = plt.cm.Set3(np.linspace(0, 1, len(communities)))
-        node_colors = []
-        
-        for node in G.nodes():
-            for i, comm in enumerate(communities):
-                if node in comm:
-                    node_colors.append(colors[i])
-                    break
-            else:
-                node_colors.append('#808080')
+        # 节点 -> 社区索引只建一次，之后每个节点一次哈希查找
+        community_of = {node: i for i, comm in enumerate(communities) for node in comm}
+        node_colors = [colors[community_of[node]] if node in community_of else '#808080'
+                       for node in G.nodes()]
         
         # 绘制网络
         nx.draw_networkx_edges(G, pos, ax=ax, alpha=0.3, edge_color='gray')
@@ -192,6 +192,40 @@ def threshold_analysis(df, exposure='Blood_Lead', outcome='Outcome'):
     return pd.DataFrame(results)
 
 
+def quantile_edges(X, n_groups=4):
+    """暴露的等频分位数切点 (忽略缺失值, 与 pd.qcut 的切点一致)"""
+    return np.quantile(X[~np.isnan(X)], np.linspace(0, 1, n_groups + 1))
+
+
+def quantile_dose_response(df, exposure='Blood_Lead', outcome='Outcome', n_groups=4):
+    """分位数组事件率 (np.digitize + np.bincount 单次扫描，替代 qcut + groupby)"""
+    X = df[exposure].to_numpy(dtype=float)
+    y = df[outcome].to_numpy(dtype=float)
+    
+    # 切点取自全部非缺失暴露值; 暴露或结局缺失的行不计入各组 (同 qcut + groupby)
+    edges = quantile_edges(X, n_groups)
+    valid = ~(np.isnan(X) | np.isnan(y))
+    X, y = X[valid], y[valid]
+    
+    # 与 pd.qcut 相同的右闭区间 (最小值归入第一组)
+    groups = np.digitize(X, edges[1:-1], right=True)
+    
+    counts = np.bincount(groups, minlength=n_groups)
+    sums = np.bincount(groups, weights=y, minlength=n_groups)
+    sq_sums = np.bincount(groups, weights=y * y, minlength=n_groups)
+    means = sums / counts
+    sds = np.sqrt(np.maximum(sq_sums / counts - means ** 2, 0))
+    
+    return pd.DataFrame({
+        'lower': edges[:-1],
+        'upper': edges[1:],
+        'Events': sums,
+        'N': counts,
+        'Rate': means,
+        'SD': sds
+    })
+
+
 def dose_response_subgroup(df, exposure='Blood_Lead', outcome='Outcome', subgroup='Gender'):
     """亚组剂量-反应分析"""
     results = {}
@@ -296,16 +330,31 @@ def plot_dose_response_heatmap(df):
     """绘制剂量-反应热力图"""
     fig, ax = plt.subplots(figsize=(12, 8))
     
-    # 创建暴露分组
-    df['Lead_Quartile'] = pd.qcut(df['Blood_Lead'], q=4, labels=['Q1 (Low)', 'Q2', 'Q3', 'Q4 (High)'])
-    df['Age_Group'] = pd.cut(df['Age'], bins=[0, 35, 50, 65, 100], labels=['18-35', '36-50', '51-65', '65+'])
-    df['Smoking_Status'] = df['Smoking'].map({0: 'Non-smoker', 1: 'Smoker'})
+    # 创建暴露分组 (在 numpy 数组上完成，不向 df 写入分组列)
+    lead_labels = ['Q1 (Low)', 'Q2', 'Q3', 'Q4 (High)']
+    age_labels = ['18-35', '36-50', '51-65', '65+']
+    lead = df['Blood_Lead'].to_numpy(dtype=float)
+    age = df['Age'].to_numpy()
+    outcome = df['Outcome'].to_numpy(dtype=float)
+    
+    # 四分位切点取自全部非缺失血铅值 (与 quantile_dose_response / pd.qcut 相同), 再剔除缺失行
+    edges = quantile_edges(lead, len(lead_labels))
+    valid = ~(np.isnan(lead) | np.isnan(age) | np.isnan(outcome)) & (age > 0) & (age <= 100)
+    lead, age, outcome = lead[valid], age[valid], outcome[valid]
+    
+    # 右闭区间, 相同取值总在同一组
+    lead_group = np.digitize(lead, edges[1:-1], right=True)
+    age_group = np.digitize(age, [35, 50, 65], right=True)
     
     # 计算各组的事件率
-    pivot = df.pivot_table(values='Outcome', 
-                          index='Lead_Quartile', 
-                          columns='Age_Group', 
-                          aggfunc='mean')
+    cell = lead_group * len(age_labels) + age_group
+    n_cells = len(lead_labels) * len(age_labels)
+    with np.errstate(invalid='ignore'):
+        rates = (np.bincount(cell, weights=outcome, minlength=n_cells) /
+                 np.bincount(cell, minlength=n_cells))
+    pivot = pd.DataFrame(rates.reshape(len(lead_labels), len(age_labels)),
+                         index=pd.Index(lead_labels, name='Lead_Quartile'),
+                         columns=pd.Index(age_labels, name='Age_Group'))
     
     # 绘制热力图
     sns.heatmap(pivot, annot=True, fmt='.2%', cmap='YlOrRd', 
@@ -456,12 +505,12 @@ def generate_dose_response_report(df):
     
     # 四分位分析
     report.append("【血铅四分位分析】")
-    df['Lead_Quartile'] = pd.qcut(df['Blood_Lead'], q=4)
-    quartile_analysis = df.groupby('Lead_Quartile')['Outcome'].agg(['sum', 'count', 'mean'])
-    quartile_analysis.columns = ['Events', 'N', 'Rate']
+    quartile_analysis = quantile_dose_response(df, n_groups=4)
     
-    for idx, row in quartile_analysis.iterrows():
-        report.append(f"{idx}: {row['Events']:.0f}/{row['N']:.0f} ({row['Rate']:.2%})")
+    for i, row in enumerate(quartile_analysis.itertuples()):
+        # 第一组包含最小值, 记为闭区间
+        left = '[' if i == 0 else '('
+        report.append(f"{left}{row.lower:.3f}, {row.upper:.3f}]: {row.Events:.0f}/{row.N:.0f} ({row.Rate:.2%})")
     
     report.append("")
     report.append("【关键发现】")
@@ -8,12 +8,18 @@ NHANES 2021-2023 周期数据下载
 
 import os
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin
+from urllib3.util.retry import Retry
 
 # 配置
 OUTPUT_DIR = "nhanes_data"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+MAX_WORKERS = 8
+CHUNK_SIZE = 1 << 20  # 1 MB
+
 # NHANES 2021-2023 数据文件列表
 # 注意: 2021-2023周期的数据在文件中标记为 "2021"，后缀为 "_L"
 NHANES_FILES = {
@@ -76,24 +82,45 @@ NHANES_FILES = {
     }
 }
 
-def download_file(url, filepath):
-    """下载单个文件"""
-    print(f"📥 下载: {url}")
-    print(f"   -> {filepath}")
+def create_session(pool_size=MAX_WORKERS):
+    """创建带连接池和自动重试的会话"""
+    session = requests.Session()
+    retry = Retry(total=5, backoff_factor=0.5,
+                  status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def download_file(url, filepath, session=None):
+    """流式下载单个文件, 支持从 .part 文件断点续传"""
+    session = session or create_session(pool_size=1)
+    partial = filepath + ".part"
     
     try:
-        response = requests.get(url, timeout=120)
-        response.raise_for_status()
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
         
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
+        with session.get(url, stream=True, timeout=(10, 120), headers=headers) as response:
+            if response.status_code == 416:
+                # 已完整下载, 服务器拒绝越界 Range
+                pass
+            else:
+                response.raise_for_status()
+                # 服务器不支持 Range 时返回 200, 需从头写入
+                mode = 'ab' if response.status_code == 206 else 'wb'
+                with open(partial, mode) as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
         
+        os.replace(partial, filepath)
         size = os.path.getsize(filepath) / 1024  # KB
-        print(f"   ✅ 完成 ({size:.1f} KB)")
+        print(f"✅ 完成: {os.path.basename(filepath)} ({size:.1f} KB)")
         return True
         
     except Exception as e:
-        print(f"   ❌ 失败: {e}")
+        print(f"❌ 失败: {url}: {e}")
         return False
 
 def main():
@@ -103,6 +130,7 @@ def main():
     
     success_count = 0
     fail_count = 0
+    pending = []
     
     # 遍历所有数据类别
     for category, datasets in NHANES_FILES.items():
@@ -119,10 +147,21 @@ def main():
                 success_count += 1
                 continue
             
-            if download_file(info["url"], filepath):
-                success_count += 1
-            else:
-                fail_count += 1
+            print(f"📥 排队: {info['url']}")
+            pending.append((info["url"], filepath))
+    
+    # 并行下载 (共享连接池)
+    if pending:
+        print(f"\n🚀 并行下载 {len(pending)} 个文件...")
+        session = create_session()
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = [pool.submit(download_file, url, filepath, session)
+                       for url, filepath in pending]
+            for future in as_completed(futures):
+                if future.result():
+                    success_count += 1
+                else:
+                    fail_count += 1
     
     print("\n" + "=" * 60)
     print(f"✅ 下载完成!")
@@ -134,6 +173,8 @@ def main():
     # 列出下载的文件
     print("\n📁 已下载的文件:")
     for f in os.listdir(OUTPUT_DIR):
+        if f.endswith(".part"):
+            continue
         size = os.path.getsize(os.path.join(OUTPUT_DIR, f)) / 1024
         print(f"   - {f} ({size:.1f} KB)")
 
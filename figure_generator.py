@@ -12,104 +12,53 @@ Based on:
 
 import os
 import sys
-import pandas as pd
-import numpy as np
 
-# Set matplotlib backend before import
-import matplotlib
-matplotlib.use('Agg')
-matplotlib.rcParams['pdf.fonttype'] = 42  # Embed fonts
-matplotlib.rcParams['ps.fonttype'] = 42
+from palettes import (TOL_BRIGHT, TOL_MUTED, TOL_MEDIUM, TOL_DARK_BLUE,
+                      COLORBLIND_SAFE, LEAD_PALETTE, CKM_STAGES)
 
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
-from matplotlib.patches import Rectangle, FancyBboxPatch
-import matplotlib.patches as mpatches
+# matplotlib / numpy / pandas are imported lazily so that importing this
+# module (e.g. from the CLI) does not pay their start-up cost.
+_MPL_CONFIGURED = False
 
-# Set style
-plt.style.use('seaborn-v0_8-whitegrid')
-rcParams['font.family'] = 'sans-serif'
-rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans', 'Helvetica']
-rcParams['axes.unicode_minus'] = False
-
-# ============================================================================
-# PAUL TOL'S COLOR SCHEMES (Scientific Standard)
-# ============================================================================
-
-# Bright scheme - for qualitative categories (most distinguishable)
-TOL_BRIGHT = [
-    '#4477AA',  # Blue
-    '#EE6677',  # Red  
-    '#228833',  # Green
-    '#CCBB44',  # Yellow
-    '#66CCEE',  # Cyan
-    '#AA3377',  # Purple
-    '#BBBBBB',  # Grey
-]
+# rcParams applied on top of the base style
+SCI_RC = {
+    'pdf.fonttype': 42,  # Embed fonts
+    'ps.fonttype': 42,
+    'font.family': 'sans-serif',
+    'font.sans-serif': ['Arial', 'DejaVu Sans', 'Helvetica'],
+    'axes.unicode_minus': False,
+}
 
-# Muted scheme - for when brightness needs to be reduced
-TOL_MUTED = [
-    '#117733',  # Green
-    '#88CCEE',  # Cyan
-    '#44AA99',  # Teal
-    '#999933',  # Olive
-    '#882255',  # Ruby
-    '#AA66CC',  # Purple
-    '#DD7788',  # Pink
-]
 
-# Medium contrast scheme
-TOL_MEDIUM = [
-    '#332288',  # Indigo
-    '#88Ccee',  # Cyan
-    '#44AA99',  # Teal
-    '#117733',  # Green
-    '#999933',  # Olive
-    '#DD7788',  # Pink
-    '#8877AA',  # Lavender
-]
+def _configure_mpl():
+    """Import matplotlib and apply the figure style (runs once)"""
+    global _MPL_CONFIGURED
+    if _MPL_CONFIGURED:
+        return
+    
+    # Set matplotlib backend before import
+    import matplotlib
+    matplotlib.use('Agg')
+    
+    import matplotlib.pyplot as plt
+    
+    # Set style
+    plt.style.use('seaborn-v0_8-whitegrid')
+    matplotlib.rcParams.update(SCI_RC)
+    
+    _MPL_CONFIGURED = True
 
-# Dark blue scheme
-TOL_DARK_BLUE = [
-    '#001c7f', '#140e3a', '#b1400d', '#12711b', '#8c08ac'
-]
 
-# Colorblind-friendly palette
-COLORBLIND_SAFE = [
-    '#E69F00',  # Orange
-    '#56B4E9',  # Sky Blue
-    '#009E73',  # Bluish Green
-    '#F0E442',  # Yellow
-    '#0072B2',  # Blue
-    '#D55E00',  # Vermillion
-    '#CC79A7',  # Reddish Purple
-]
+LEAD_QUARTILE_LABELS = ('Q1\n(Low)', 'Q2', 'Q3', 'Q4\n(High)')
 
-# ============================================================================
-# CUSTOM PROFESSIONAL PALETTES
-# ============================================================================
 
-# Lead research theme - sophisticated blues
-LEAD_PALETTE = {
-    'primary': '#1a5276',      # Deep blue
-    'secondary': '#2980b9',    # Blue
-    'accent': '#e74c3c',       # Red (for lead/important)
-    'neutral': '#7f8c8d',      # Grey
-    'light': '#ebf5fb',        # Light blue
-    'dark': '#0a2540',         # Dark navy
-    'highlight': '#f39c12',    # Gold/amber
-    'success': '#27ae60',      # Green
-    'gradient': ['#0a2540', '#1a5276', '#2980b9', '#5dade2', '#aed6f1'],
-}
+def lead_quartile_codes(lead):
+    """Blood lead quartile codes 0-3 as int8 (right-closed bins, as pd.qcut)"""
+    import numpy as np
+    
+    edges = np.quantile(lead, [0.25, 0.5, 0.75])
+    return np.searchsorted(edges, lead).astype(np.int8)
 
-# CKM syndrome stages
-CKM_STAGES = {
-    0: '#27ae60',   # Green - healthy
-    1: '#f1c40f',   # Yellow - risk
-    2: '#e67e22',   # Orange - disease
-    3: '#e74c3c',   # Red - severe
-    4: '#8e44ad',   # Purple - critical
-}
 
 # ============================================================================
 # FIGURE CLASSES
@@ -119,6 +68,7 @@ class ScientificFigure:
     """Base class for scientific figures"""
     
     def __init__(self, figsize=(10, 8), dpi=300):
+        _configure_mpl()
         self.figsize = figsize
         self.dpi = dpi
         self.colors = LEAD_PALETTE
@@ -126,6 +76,8 @@ class ScientificFigure:
         
     def setup_figure(self, nrows=1, ncols=1, figsize=None):
         """Create figure with proper settings"""
+        import matplotlib.pyplot as plt
+        
         if figsize is None:
             figsize = self.figsize
         fig, axes = plt.subplots(nrows, ncols, figsize=figsize, dpi=self.dpi)
@@ -155,38 +107,74 @@ class ScientificFigure:
         ax.grid(True, alpha=0.3, linestyle='--')
         ax.set_axisbelow(True)
         
-    def save_figure(self, fig, filename, bbox_inches='tight', pad_inches=0.1):
-        """Save figure with proper settings"""
+        # Rasterize artists below zorder 0 in vector output; axes/text stay vector
+        ax.set_rasterization_zorder(0)
+        
+    def save_figure(self, fig, filename, bbox_inches='tight', pad_inches=0.1,
+                    save_pdf=True):
+        """Save figure with proper settings (PNG plus a vector PDF copy)"""
+        import matplotlib.pyplot as plt
+        
         fig.savefig(filename, dpi=self.dpi, bbox_inches=bbox_inches, 
                    pad_inches=pad_inches, facecolor='white', edgecolor='none')
         print(f"Saved: {filename}")
+        if save_pdf:
+            pdf_filename = os.path.splitext(filename)[0] + '.pdf'
+            fig.savefig(pdf_filename, dpi=self.dpi, bbox_inches=bbox_inches, 
+                       pad_inches=pad_inches, facecolor='white', edgecolor='none')
+            print(f"Saved: {pdf_filename}")
         plt.close(fig)
 
 
 class Figure1_LeadDistribution(ScientificFigure):
     """Figure 1: Lead Distribution and Correlations"""
     
+    # Above this many points the scatter panels switch to a hexbin density
+    HEXBIN_MIN_POINTS = 5000
+    
+    def density_scatter(self, ax, x, y, color):
+        """Scatter for small samples, hexbin density for large ones"""
+        if len(x) > self.HEXBIN_MIN_POINTS:
+            return ax.hexbin(x, y, gridsize=40, cmap='Blues', mincnt=1, linewidths=0,
+                             rasterized=True)
+        return ax.scatter(x, y, c=color, alpha=0.4, s=30, edgecolor='none',
+                          rasterized=True)
+    
     def create(self, df, output_dir):
+        import matplotlib.pyplot as plt
+        import numpy as np
+        from statistical_tests import linear_fits
+        
         print("Creating Figure 1: Lead Distribution and Correlations...")
         
-        fig, axes = plt.subplots(2, 2, figsize=(14, 12), dpi=300)
-        fig.patch.set_facecolor('white')
+        fig, axes = self.setup_figure(2, 2, figsize=(14, 12))
         
         # Color palette
         lead_color = self.colors['primary']
         accent_color = self.colors['accent']
         
+        # Extract Blood_Lead once; both trend fits are solved in one pass
+        lead = df['Blood_Lead'].to_numpy(dtype=np.float64)
+        lead_mean = lead.mean()
+        x_line = np.linspace(lead.min(), lead.max(), 100)
+        slopes, intercepts, rs = linear_fits(
+            lead, df[['SBP', 'HbA1c']].to_numpy(dtype=np.float64))
+        
         # ========== Panel A: Lead Distribution ==========
         ax = axes[0, 0]
         
-        # Histogram with professional styling
-        n, bins, patches = ax.hist(df['Blood_Lead'], bins=35, 
-                                    color=lead_color, alpha=0.8,
-                                    edgecolor='white', linewidth=0.5)
+        # Histogram with professional styling (binned in NumPy, drawn as one bar call)
+        counts, bin_edges = np.histogram(lead, bins=35)
+        ax.bar(bin_edges[:-1], counts, width=np.diff(bin_edges), align='edge',
+               color=lead_color, alpha=0.8, edgecolor='white', linewidth=0.5)
         
-        # Add mean line
-        mean_val = df['Blood_Lead'].mean()
-        median_val = df['Blood_Lead'].median()
+        # Add mean line (mean reused from the trend setup; median by O(n) partition)
+        mean_val = lead_mean
+        k = lead.size // 2
+        if lead.size % 2:
+            median_val = np.partition(lead, k)[k]
+        else:
+            median_val = np.partition(lead, [k - 1, k])[k - 1:k + 1].mean()
         
         ax.axvline(mean_val, color=accent_color, linestyle='--', 
                    linewidth=2, label=f'Mean: {mean_val:.2f}')
@@ -206,18 +194,14 @@ class Figure1_LeadDistribution(ScientificFigure):
         ax = axes[0, 1]
         
         # Scatter with density coloring
-        scatter = ax.scatter(df['Blood_Lead'], df['SBP'], 
-                           c=lead_color, alpha=0.4, s=30, edgecolor='none')
+        self.density_scatter(ax, lead, df['SBP'].to_numpy(), lead_color)
         
         # Trend line
-        z = np.polyfit(df['Blood_Lead'], df['SBP'], 1)
-        p = np.poly1d(z)
-        x_line = np.linspace(df['Blood_Lead'].min(), df['Blood_Lead'].max(), 100)
-        ax.plot(x_line, p(x_line), color=accent_color, linewidth=2.5, 
+        slope, intercept, r = slopes[0], intercepts[0], rs[0]
+        ax.plot(x_line, slope * x_line + intercept, color=accent_color, linewidth=2.5, 
                 linestyle='-', label='Linear trend')
         
         # Add correlation
-        r = np.corrcoef(df['Blood_Lead'], df['SBP'])[0, 1]
         ax.text(0.05, 0.95, f'r = {r:.3f}', transform=ax.transAxes,
                fontsize=12, fontweight='bold', va='top',
                bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
@@ -231,15 +215,12 @@ class Figure1_LeadDistribution(ScientificFigure):
         # ========== Panel C: Lead vs HbA1c ==========
         ax = axes[1, 0]
         
-        scatter = ax.scatter(df['Blood_Lead'], df['HbA1c'], 
-                           c=self.colors['secondary'], alpha=0.4, s=30, edgecolor='none')
+        self.density_scatter(ax, lead, df['HbA1c'].to_numpy(), self.colors['secondary'])
         
         # Trend line
-        z = np.polyfit(df['Blood_Lead'], df['HbA1c'], 1)
-        p = np.poly1d(z)
-        ax.plot(x_line, p(x_line), color=self.colors['accent'], linewidth=2.5)
+        slope, intercept, r = slopes[1], intercepts[1], rs[1]
+        ax.plot(x_line, slope * x_line + intercept, color=self.colors['accent'], linewidth=2.5)
         
-        r = np.corrcoef(df['Blood_Lead'], df['HbA1c'])[0, 1]
         ax.text(0.05, 0.95, f'r = {r:.3f}', transform=ax.transAxes,
                fontsize=12, fontweight='bold', va='top',
                bbox=dict(boxstyle='round', facecolor='white', alpha=0.8))
@@ -253,16 +234,22 @@ class Figure1_LeadDistribution(ScientificFigure):
         # ========== Panel D: MetS by Lead Quartile ==========
         ax = axes[1, 1]
         
-        df['Lead_Quartile'] = pd.qcut(df['Blood_Lead'], 4, labels=['Q1\n(Low)', 'Q2', 'Q3', 'Q4\n(High)'])
-        quartile_means = df.groupby('Lead_Quartile')['MetS'].mean()
+        # Quartile means via bincount over the shared quartile codes
+        if 'Lead_Quartile_Code' in df:
+            quartile = df['Lead_Quartile_Code'].to_numpy()
+        else:
+            quartile = lead_quartile_codes(lead)
+        mets = df['MetS'].to_numpy()
+        quartile_means = (np.bincount(quartile, weights=mets, minlength=4) /
+                          np.bincount(quartile, minlength=4))
         
         # Professional bar chart
-        bars = ax.bar(quartile_means.index, quartile_means.values, 
+        bars = ax.bar(LEAD_QUARTILE_LABELS, quartile_means, 
                      color=self.colors['gradient'][1:5], 
                      edgecolor='white', linewidth=1)
         
         # Add value labels on bars
-        for bar, val in zip(bars, quartile_means.values):
+        for bar, val in zip(bars, quartile_means):
             ax.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.05,
                    f'{val:.2f}', ha='center', va='bottom', fontsize=11, fontweight='bold')
         
@@ -290,10 +277,12 @@ class Figure2_CorrelationHeatmap(ScientificFigure):
     """Figure 2: Professional Correlation Heatmap"""
     
     def create(self, df, output_dir):
+        import matplotlib.pyplot as plt
+        import numpy as np
+        
         print("Creating Figure 2: Correlation Heatmap...")
         
-        fig, ax = plt.subplots(figsize=(12, 10), dpi=300)
-        fig.patch.set_facecolor('white')
+        fig, ax = self.setup_figure(figsize=(12, 10))
         
         # Select columns for correlation
         corr_cols = ['Blood_Lead', 'SBP', 'DBP', 'BMI', 'HbA1c', 
@@ -303,14 +292,18 @@ class Figure2_CorrelationHeatmap(ScientificFigure):
         labels = ['Blood Pb', 'SBP', 'DBP', 'BMI', 'HbA1c', 
                  'Triglycerides', 'HDL', 'MetS']
         
-        # Calculate correlation
-        corr_matrix = df[corr_cols].corr()
+        # Calculate correlation (complete cases, one GEMM on standardized data)
+        X = df[corr_cols].to_numpy(dtype=np.float32)
+        X = X[~np.isnan(X).any(axis=1)]
+        X -= X.mean(axis=0)
+        X /= X.std(axis=0, ddof=1)
+        corr_matrix = (X.T @ X) / (X.shape[0] - 1)
         
         # Create heatmap with diverging colormap
         cmap = plt.cm.RdBu_r  # Red-Blue diverging
         vmin, vmax = -1, 1
         
-        im = ax.imshow(corr_matrix.values, cmap=cmap, aspect='auto', 
+        im = ax.imshow(corr_matrix, cmap=cmap, aspect='auto', 
                       vmin=vmin, vmax=vmax)
         
         # Set ticks
@@ -324,13 +317,14 @@ class Figure2_CorrelationHeatmap(ScientificFigure):
         cbar.set_label('Pearson Correlation', fontsize=12, fontweight='bold')
         cbar.ax.tick_params(labelsize=10)
         
-        # Add correlation values
-        for i in range(len(labels)):
-            for j in range(len(labels)):
-                val = corr_matrix.iloc[i, j]
-                color = 'white' if abs(val) > 0.5 else 'black'
-                ax.text(j, i, f'{val:.2f}', ha='center', va='center', 
-                       fontsize=10, fontweight='bold', color=color)
+        # Add correlation values (strings and colors precomputed, drawn from flat arrays)
+        text_values = np.char.mod('%.2f', corr_matrix)
+        text_colors = np.where(np.abs(corr_matrix) > 0.5, 'white', 'black')
+        rows, cols = np.indices(corr_matrix.shape)
+        for i, j, text, color in zip(rows.ravel(), cols.ravel(),
+                                     text_values.ravel(), text_colors.ravel()):
+            ax.text(j, i, text, ha='center', va='center', 
+                   fontsize=10, fontweight='bold', color=color)
         
         ax.set_title('Correlation Matrix: Lead and CKM Indicators', 
                     fontsize=16, fontweight='bold', pad=20)
@@ -347,10 +341,12 @@ class Figure3_AOPPathway(ScientificFigure):
     """Figure 3: AOP Pathway Diagram - Professional Style"""
     
     def create(self, output_dir):
+        from matplotlib.collections import PatchCollection
+        from matplotlib.patches import FancyArrowPatch, FancyBboxPatch
+        
         print("Creating Figure 3: AOP Pathway Diagram...")
         
-        fig, ax = plt.subplots(figsize=(16, 12), dpi=300)
-        fig.patch.set_facecolor('white')
+        fig, ax = self.setup_figure(figsize=(16, 12))
         ax.set_xlim(0, 16)
         ax.set_ylim(0, 12)
         ax.axis('off')
@@ -372,27 +368,36 @@ class Figure3_AOPPathway(ScientificFigure):
             'outcome': self.colors['accent']
         }
         
-        # Box style function
-        def draw_box(ax, x, y, width, height, text, color, fontsize=11):
-            """Draw a professional box"""
-            rect = FancyBboxPatch((x-width/2, y-height/2), width, height,
-                                  boxstyle="round,pad=0.02,rounding_size=0.3",
-                                  facecolor=color, edgecolor='white', 
-                                  linewidth=2, alpha=0.9)
-            ax.add_patch(rect)
+        # Boxes are collected into one PatchCollection; arrows are plain
+        # FancyArrowPatches (their paths are resolved in display space, so
+        # they cannot share a collection)
+        boxes = []
+        arrows = []
+        
+        def draw_box(x, y, width, height, text, color, fontsize=11):
+            """Queue a professional box and draw its label"""
+            boxes.append(FancyBboxPatch((x-width/2, y-height/2), width, height,
+                                        boxstyle="round,pad=0.02,rounding_size=0.3",
+                                        facecolor=color, edgecolor='white', 
+                                        linewidth=2, alpha=0.9))
             ax.text(x, y, text, ha='center', va='center', 
                    fontsize=fontsize, fontweight='bold', color='white')
         
+        def draw_arrow(start, end, color='gray', lw=1.5, connectionstyle='arc3'):
+            """Queue an arrow from start to end"""
+            arrows.append(FancyArrowPatch(start, end, arrowstyle='->', color=color,
+                                          lw=lw, mutation_scale=10,
+                                          connectionstyle=connectionstyle))
+        
         # Draw pathway
         # Row 1: MIE
-        draw_box(ax, 8, 9, 4, 0.8, 'Lead Exposure\n(MIE)', pathway_colors['exposure'], 12)
+        draw_box(8, 9, 4, 0.8, 'Lead Exposure\n(MIE)', pathway_colors['exposure'], 12)
         
         # Arrow
-        ax.annotate('', xy=(8, 8.2), xytext=(8, 8.6),
-                   arrowprops=dict(arrowstyle='->', color='black', lw=2))
+        draw_arrow((8, 8.6), (8, 8.2), color='black', lw=2)
         
         # Row 2: KE1 - Oxidative Stress (Hub)
-        draw_box(ax, 8, 7.5, 5, 1, 'Oxidative Stress\n(KE1: Key Event)', pathway_colors['oxidative'], 12)
+        draw_box(8, 7.5, 5, 1, 'Oxidative Stress\n(KE1: Key Event)', pathway_colors['oxidative'], 12)
         
         # Row 3: Three branches
         branches = [
@@ -402,11 +407,9 @@ class Figure3_AOPPathway(ScientificFigure):
         ]
         
         for x, y, text, color in branches:
-            draw_box(ax, x, y, 3.5, 1, text, color)
+            draw_box(x, y, 3.5, 1, text, color)
             # Arrow from KE1
-            ax.annotate('', xy=(x, 5.6), xytext=(8, 7),
-                       arrowprops=dict(arrowstyle='->', color='gray', lw=1.5, 
-                                     connectionstyle='arc3,rad=0.1'))
+            draw_arrow((8, 7), (x, 5.6), connectionstyle='arc3,rad=0.1')
         
         # Row 4: Organ damage
         damage_boxes = [
@@ -416,24 +419,19 @@ class Figure3_AOPPathway(ScientificFigure):
         ]
         
         for x, y, text, color in damage_boxes:
-            draw_box(ax, x, y, 3, 0.8, text, color, 11)
+            draw_box(x, y, 3, 0.8, text, color, 11)
             # Arrows from KE2 to damage
-            if x == 3:
-                ax.annotate('', xy=(3, 3.6), xytext=(3, 4.6),
-                           arrowprops=dict(arrowstyle='->', color='gray', lw=1.5))
-            elif x == 8:
-                ax.annotate('', xy=(8, 3.6), xytext=(8, 4.6),
-                           arrowprops=dict(arrowstyle='->', color='gray', lw=1.5))
-            else:
-                ax.annotate('', xy=(13, 3.6), xytext=(13, 4.6),
-                           arrowprops=dict(arrowstyle='->', color='gray', lw=1.5))
+            draw_arrow((x, 4.6), (x, 3.6))
         
         # Row 5: Final outcome
-        ax.annotate('', xy=(8, 2.2), xytext=(8, 2.6),
-                   arrowprops=dict(arrowstyle='->', color='black', lw=2))
-        draw_box(ax, 8, 1.5, 6, 1, 'CKM Syndrome Progression\n(Adverse Outcome)', 
+        draw_arrow((8, 2.6), (8, 2.2), color='black', lw=2)
+        draw_box(8, 1.5, 6, 1, 'CKM Syndrome Progression\n(Adverse Outcome)', 
                 pathway_colors['outcome'], 13)
         
+        ax.add_collection(PatchCollection(boxes, match_original=True))
+        for arrow in arrows:
+            ax.add_patch(arrow)
+        
         # Add legend/notes
         note_text = """
         MIE: Molecular Initiating Event
@@ -460,6 +458,8 @@ VCell: Endothelial & Macrophage models"""
 
 def generate_all_figures(data_file, output_dir):
     """Generate all figures"""
+    import numpy as np
+    import pandas as pd
     
     print("="*60)
     print("Generating Professional Scientific Figures")
@@ -472,22 +472,26 @@ def generate_all_figures(data_file, output_dir):
     else:
         print(f"Data file not found: {data_file}")
         print("Generating simulation data...")
-        # Generate simulation data
-        np.random.seed(42)
+        # Generate simulation data: one multivariate normal draw whose
+        # covariance encodes the Lead-SBP / Lead-HbA1c associations.
+        # Blood_Lead and Triglycerides are drawn on the log scale.
+        rng = np.random.default_rng(42)
         n = 500
-        df = pd.DataFrame({
-            'Blood_Lead': np.random.lognormal(mean=-0.5, sigma=0.8, size=n),
-            'SBP': np.random.normal(125, 15, size=n),
-            'DBP': np.random.normal(80, 10, size=n),
-            'BMI': np.random.normal(27, 5, size=n),
-            'HbA1c': np.random.normal(5.5, 1, size=n),
-            'Triglycerides': np.random.lognormal(5, 0.5, size=n),
-            'HDL': np.random.normal(50, 15, size=n),
-            'MetS': np.random.randint(0, 4, size=n),
-        })
-        # Add correlations
-        df['SBP'] = df['SBP'] + df['Blood_Lead'] * 5
-        df['HbA1c'] = df['HbA1c'] + df['Blood_Lead'] * 0.1
+        columns = ['Blood_Lead', 'SBP', 'DBP', 'BMI', 'HbA1c', 'Triglycerides', 'HDL']
+        mean = np.array([-0.5, 125, 80, 27, 5.5, 5, 50])
+        sd = np.array([0.8, 15, 10, 5, 1, 0.5, 15])
+        corr = np.eye(len(columns))
+        corr[0, 1] = corr[1, 0] = 0.25   # log(Lead) - SBP
+        corr[0, 4] = corr[4, 0] = 0.08   # log(Lead) - HbA1c
+        cov = corr * np.outer(sd, sd)
+        
+        X = rng.multivariate_normal(mean, cov, size=n)
+        X[:, [0, 5]] = np.exp(X[:, [0, 5]])
+        df = pd.DataFrame(X, columns=columns)
+        df['MetS'] = rng.integers(0, 4, size=n)
+    
+    # Assign lead quartiles once; reused by every panel that groups by quartile
+    df['Lead_Quartile_Code'] = lead_quartile_codes(df['Blood_Lead'].to_numpy())
     
     # Create figures
     fig1 = Figure1_LeadDistribution()
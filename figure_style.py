@@ -11,82 +11,17 @@ Usage:
 """
 
 import matplotlib
-matplotlib.use('Agg')
+matplotlib.use('Agg', force=True)
+# No open-figure warnings in batch runs; simplify long paths at pixel precision
+matplotlib.rcParams['figure.max_open_warning'] = 0
+matplotlib.rcParams['path.simplify'] = True
+matplotlib.rcParams['path.simplify_threshold'] = 1.0
 import matplotlib.pyplot as plt
 import numpy as np
 
-# ============================================================================
-# PAUL TOL'S COLOR SCHEMES (Scientific Standard)
-# ============================================================================
-
-# Bright scheme - for qualitative categories
-TOL_BRIGHT = [
-    '#4477AA',  # Blue
-    '#EE6677',  # Red  
-    '#228833',  # Green
-    '#CCBB44',  # Yellow
-    '#66CCEE',  # Cyan
-    '#AA3377',  # Purple
-    '#BBBBBB',  # Grey
-]
-
-# Muted scheme
-TOL_MUTED = [
-    '#117733',  # Green
-    '#88CCEE',  # Cyan
-    '#44AA99',  # Teal
-    '#999933',  # Olive
-    '#882255',  # Ruby
-    '#AA66CC',  # Purple
-    '#DD7788',  # Pink
-]
-
-# Colorblind-friendly palette (Wong)
-COLORBLIND_SAFE = [
-    '#E69F00',  # Orange
-    '#56B4E9',  # Sky Blue
-    '#009E73',  # Bluish Green
-    '#F0E442',  # Yellow
-    '#0072B2',  # Blue
-    '#D55E00',  # Vermillion
-    '#CC79A7',  # Reddish Purple
-]
-
-# ============================================================================
-# CUSTOM PROFESSIONAL PALETTES
-# ============================================================================
-
-# Lead research theme
-LEAD_PALETTE = {
-    'primary': '#1a5276',      # Deep blue
-    'secondary': '#2980b9',    # Blue
-    'accent': '#e74c3c',       # Red
-    'neutral': '#7f8c8d',      # Grey
-    'light': '#ebf5fb',        # Light blue
-    'dark': '#0a2540',         # Dark navy
-    'highlight': '#f39c12',    # Gold
-    'success': '#27ae60',      # Green
-    'gradient': ['#0a2540', '#1a5276', '#2980b9', '#5dade2', '#aed6f1'],
-}
-
-# CKM stages
-CKM_STAGES = {
-    0: '#27ae60',   # Green - healthy
-    1: '#f1c40f',   # Yellow - risk
-    2: '#e67e22',   # Orange - disease
-    3: '#e74c3c',   # Red - severe
-    4: '#8e44ad',   # Purple - critical
-}
-
-# Nature-style palette
-NATURE_PALETTE = {
-    'blue': '#3B4992',
-    'red': '#EE0000',
-    'green': '#008B45',
-    'orange': '#FF8C00',
-    'purple': '#800080',
-    'grey': '#808080',
-}
+from palettes import (TOL_BRIGHT, TOL_MUTED, COLORBLIND_SAFE, LEAD_PALETTE,
+                      CKM_STAGES, NATURE_PALETTE)
+from statistical_tests import linear_fits
 
 # ============================================================================
 # STYLE FUNCTIONS
@@ -121,21 +56,30 @@ def create_publication_figure(figsize=(10, 8), dpi=300):
     return fig, ax
 
 
-def save_publication_figure(fig, filename, dpi=300, bbox_inches='tight'):
-    """Save figure with publication settings"""
-    fig.savefig(filename, dpi=dpi, bbox_inches=bbox_inches,
-               facecolor='white', edgecolor='none')
+# Fixed margins replace bbox_inches='tight', which renders the canvas twice per save
+FIGURE_MARGINS = dict(left=0.12, right=0.95, bottom=0.12, top=0.90)
+
+
+def save_publication_figure(fig, filename, dpi=300):
+    """Save figure with publication settings (use .pdf/.svg for vector output)"""
+    fig.savefig(filename, dpi=dpi, facecolor='white', edgecolor='none')
     plt.close(fig)
     print(f"Saved: {filename}")
 
 
+def save_preview_figure(fig, filename, dpi=120):
+    """Save a low-resolution raster preview for screen/HTML use"""
+    save_publication_figure(fig, filename, dpi=dpi)
+
+
 # ============================================================================
 # QUICK PLOT FUNCTIONS
 # ============================================================================
 
 def plot_distribution(data, title, xlabel, filename, color='#1a5276'):
     """Quick distribution plot"""
-    fig, ax = plt.subplots(figsize=(8, 6), dpi=300)
+    fig, ax = plt.subplots(figsize=(8, 6))
+    fig.subplots_adjust(**FIGURE_MARGINS)
     fig.patch.set_facecolor('white')
     
     ax.hist(data, bins=30, color=color, alpha=0.8, edgecolor='white')
@@ -150,19 +94,20 @@ def plot_distribution(data, title, xlabel, filename, color='#1a5276'):
 def plot_scatter_with_trend(x, y, title, xlabel, ylabel, filename, 
                             color='#2980b9', annotate_r=True):
     """Quick scatter plot with trend line"""
-    fig, ax = plt.subplots(figsize=(8, 6), dpi=300)
+    fig, ax = plt.subplots(figsize=(8, 6))
+    fig.subplots_adjust(**FIGURE_MARGINS)
     fig.patch.set_facecolor('white')
     
     ax.scatter(x, y, c=color, alpha=0.4, s=30, edgecolor='none')
     
-    # Trend line
-    z = np.polyfit(x, y, 1)
-    p = np.poly1d(z)
+    # Trend line (centred closed-form fit, shared with figure_generator)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    (slope,), (intercept,), (r,) = linear_fits(x, y[:, None])
     x_line = np.linspace(x.min(), x.max(), 100)
-    ax.plot(x_line, p(x_line), color='#e74c3c', linewidth=2.5)
+    ax.plot(x_line, slope * x_line + intercept, color='#e74c3c', linewidth=2.5)
     
     if annotate_r:
-        r = np.corrcoef(x, y)[0, 1]
         add_correlation_annotation(ax, r)
     
     ax.set_xlabel(xlabel, fontsize=12, fontweight='bold')
@@ -173,13 +118,25 @@ def plot_scatter_with_trend(x, y, title, xlabel, ylabel, filename,
     save_publication_figure(fig, filename)
 
 
+# Above this many variables per side the per-cell labels are unreadable anyway
+MAX_ANNOTATED_CELLS = 15
+
+
 def plot_correlation_heatmap(corr_matrix, title, filename, labels=None):
     """Quick correlation heatmap"""
-    fig, ax = plt.subplots(figsize=(10, 8), dpi=300)
+    fig, ax = plt.subplots(figsize=(10, 8))
+    fig.subplots_adjust(left=0.15, right=0.98, bottom=0.18, top=0.92)
     fig.patch.set_facecolor('white')
     
+    vals = np.asarray(corr_matrix, dtype=np.float32)
+    n_vars = vals.shape[0]
+    
+    # Colormap applied once; imshow gets ready-made RGBA and skips normalization on redraw
     cmap = plt.cm.RdBu_r
-    im = ax.imshow(corr_matrix.values, cmap=cmap, aspect='auto', vmin=-1, vmax=1)
+    norm = plt.Normalize(vmin=-1, vmax=1)
+    rgba = cmap(norm(vals), bytes=True)
+    ax.imshow(rgba, aspect='auto')
+    im = plt.cm.ScalarMappable(norm=norm, cmap=cmap)
     
     if labels is not None:
         ax.set_xticks(np.arange(len(labels)))
@@ -189,11 +146,13 @@ def plot_correlation_heatmap(corr_matrix, title, filename, labels=None):
     
     plt.colorbar(im, ax=ax, shrink=0.8)
     
-    for i in range(len(corr_matrix)):
-        for j in range(len(corr_matrix)):
-            val = corr_matrix.iloc[i, j]
-            color = 'white' if abs(val) > 0.5 else 'black'
-            ax.text(j, i, f'{val:.2f}', ha='center', va='center',
+    # Cell labels: colours and strings built in one pass, skipped for large matrices
+    if n_vars <= MAX_ANNOTATED_CELLS:
+        rows, cols = np.indices(vals.shape)
+        texts = np.char.mod('%.2f', vals).ravel()
+        colors = np.where(np.abs(vals) > 0.5, 'white', 'black').ravel()
+        for i, j, text, color in zip(rows.ravel(), cols.ravel(), texts, colors):
+            ax.text(j, i, text, ha='center', va='center',
                    fontsize=9, fontweight='bold', color=color)
     
     ax.set_title(title, fontsize=14, fontweight='bold')
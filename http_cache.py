@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+铅网络毒理学 - HTTP 响应本地缓存
+Lead Network Toxicology - HTTP Response Cache
+
+按 URL + 请求体哈希把 JSON 响应存到 output/http_cache，供 lead_network_toxicology
+(CTD/STRING) 与 lead_bp_targets (UniProt/PDB) 共用；有效期由调用方按数据源指定。
+
+用法:
+    from http_cache import cache_file, load_cached, save_cached
+    path = cache_file(url, params)
+    data = load_cached(path, ttl=24 * 3600)
+    if data is None:
+        data = requests.get(url, params=params).json()
+        save_cached(path, data)
+"""
+
+import hashlib
+import json
+import os
+import time
+
+HTTP_CACHE_DIR = os.path.join("output", "http_cache")
+
+
+def cache_file(url, payload=None):
+    """请求对应的缓存文件路径 (URL + 按键排序的请求体取 sha256)"""
+    key = url if payload is None else url + json.dumps(payload, sort_keys=True)
+    return os.path.join(HTTP_CACHE_DIR, hashlib.sha256(key.encode()).hexdigest()[:32] + ".json")
+
+
+def load_cached(path, ttl):
+    """读取 ttl 秒内写入的缓存，缺失或过期返回 None"""
+    if os.path.exists(path) and time.time() - os.path.getmtime(path) < ttl:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+def save_cached(path, data):
+    """写入缓存 (先写临时文件再原子替换)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
@@ -26,6 +26,8 @@ from sklearn.preprocessing import StandardScaler, PolynomialFeatures
 import warnings
 warnings.filterwarnings('ignore')
 
+from analyze_nhanes import cached_parquet
+
 # ============================================================================
 # 配置
 # ============================================================================
@@ -54,16 +56,11 @@ PFAS = {
 
 
 def load_nhanes_data():
-    """加载NHANES数据"""
-    data_files = [
-        'nhanes_data/nhanes_lead_blood.csv',
-        'nhanes_data/PBCD_L.xpt',
-    ]
+    """加载NHANES数据 (CSV 经 Parquet 缓存读取, 与 XPT 文件共用 analyze_nhanes 的缓存机制)"""
+    csv_path = 'nhanes_data/nhanes_lead_blood.csv'
     
-    # 优先使用CSV
-    if os.path.exists('nhanes_data/nhanes_lead_blood.csv'):
-        df = pd.read_csv('nhanes_data/nhanes_lead_blood.csv')
-        return df
+    if os.path.exists(csv_path):
+        return pd.read_parquet(cached_parquet(csv_path))
     
     return None
 
@@ -24,6 +24,8 @@ from sklearn.preprocessing import StandardScaler
 import warnings
 import os
 
+from plotly_export import save_static_batch, HtmlWriter
+
 warnings.filterwarnings('ignore')
 
 OUTPUT_DIR = '/Users/pengsu/mycode/lead-network-toxicology/output'
@@ -366,7 +368,7 @@ def create_comprehensive_forest_dashboard(df):
     return fig
 
 
-def main():
+def main(singlecore=False):
     """主函数"""
     print("=" * 60)
     print("铅网络毒理学 - 交互式森林图分析")
@@ -388,24 +390,31 @@ def main():
     # 生成森林图
     print("\n[3/4] 生成交互式森林图...")
     
-    # 单变量森林图
-    fig1 = create_interactive_forest_plot(results)
-    fig1.write_html(os.path.join(OUTPUT_DIR, 'interactive_forest_plot.html'))
-    fig1.write_image(os.path.join(OUTPUT_DIR, 'interactive_forest_plot.png'), scale=2)
-    print(f"    保存: {OUTPUT_DIR}/interactive_forest_plot.html")
-    
-    # 亚组分析森林图
-    fig2 = create_subgroup_forest_plot(results)
-    fig2.write_html(os.path.join(OUTPUT_DIR, 'interactive_subgroup_forest.html'))
-    fig2.write_image(os.path.join(OUTPUT_DIR, 'interactive_subgroup_forest.png'), scale=2)
-    print(f"    保存: {OUTPUT_DIR}/interactive_subgroup_forest.html")
-    
-    # 综合仪表板
-    print("\n[4/4] 生成综合分析仪表板...")
-    fig3 = create_comprehensive_forest_dashboard(df)
-    fig3.write_html(os.path.join(OUTPUT_DIR, 'interactive_forest_dashboard.html'))
-    fig3.write_image(os.path.join(OUTPUT_DIR, 'interactive_forest_dashboard.png'), scale=2)
-    print(f"    保存: {OUTPUT_DIR}/interactive_forest_dashboard.html")
+    # HTML 在子进程中写出 (--singlecore 时同步写出)
+    with HtmlWriter(singlecore=singlecore) as html_writer:
+        # 单变量森林图
+        fig1 = create_interactive_forest_plot(results)
+        html_writer.submit(fig1, os.path.join(OUTPUT_DIR, 'interactive_forest_plot.html'))
+        print(f"    保存: {OUTPUT_DIR}/interactive_forest_plot.html")
+    
+        # 亚组分析森林图
+        fig2 = create_subgroup_forest_plot(results)
+        html_writer.submit(fig2, os.path.join(OUTPUT_DIR, 'interactive_subgroup_forest.html'))
+        print(f"    保存: {OUTPUT_DIR}/interactive_subgroup_forest.html")
+    
+        # 综合仪表板
+        print("\n[4/4] 生成综合分析仪表板...")
+        fig3 = create_comprehensive_forest_dashboard(df)
+        html_writer.submit(fig3, os.path.join(OUTPUT_DIR, 'interactive_forest_dashboard.html'))
+        print(f"    保存: {OUTPUT_DIR}/interactive_forest_dashboard.html")
+    
+        # 静态图统一导出 (共用一个 Kaleido 会话)
+        save_static_batch([fig1, fig2, fig3],
+                          [os.path.join(OUTPUT_DIR, name) for name in (
+                              'interactive_forest_plot.png',
+                              'interactive_subgroup_forest.png',
+                              'interactive_forest_dashboard.png')],
+                          scale=2)
     
     print("\n" + "=" * 60)
     print("✅ 交互式森林图分析完成!")
@@ -415,4 +424,8 @@ def main():
 
 
 if __name__ == "__main__":
-    results = main()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--singlecore', action='store_true', help='在主进程中同步写出 HTML')
+    args = parser.parse_args()
+    results = main(singlecore=args.singlecore)
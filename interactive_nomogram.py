@@ -28,6 +28,8 @@ from sklearn.metrics import roc_auc_score, brier_score_loss
 import warnings
 import os
 
+from plotly_export import save_static_batch, HtmlWriter
+
 warnings.filterwarnings('ignore')
 
 OUTPUT_DIR = '/Users/pengsu/mycode/lead-network-toxicology/output'
@@ -526,7 +528,7 @@ def create_comprehensive_nomogram_dashboard(model, scaler, feature_cols, feature
     return fig
 
 
-def main():
+def main(singlecore=False):
     """主函数"""
     print("=" * 60)
     print("铅网络毒理学 - 交互式列线图分析")
@@ -585,26 +587,33 @@ def main():
     X_all_scaled = scaler.fit_transform(X)
     model.fit(X_all_scaled, y)
     
-    # 生成列线图
-    print("\n[3/5] 生成交互式列线图...")
-    fig1 = create_interactive_nomogram(model, scaler, feature_cols, feature_ranges)
-    fig1.write_html(os.path.join(OUTPUT_DIR, 'interactive_nomogram.html'))
-    fig1.write_image(os.path.join(OUTPUT_DIR, 'interactive_nomogram.png'), scale=2)
-    print(f"    保存: {OUTPUT_DIR}/interactive_nomogram.html")
-    
-    # 校准曲线
-    print("\n[4/5] 生成校准曲线...")
-    fig2 = create_calibration_plot(model, scaler, X_all_scaled, y)
-    fig2.write_html(os.path.join(OUTPUT_DIR, 'interactive_calibration_nomogram.html'))
-    fig2.write_image(os.path.join(OUTPUT_DIR, 'interactive_calibration_nomogram.png'), scale=2)
-    print(f"    保存: {OUTPUT_DIR}/interactive_calibration_nomogram.html")
-    
-    # 综合仪表板
-    print("\n[5/5] 生成综合分析仪表板...")
-    fig3 = create_comprehensive_nomogram_dashboard(model, scaler, feature_cols, feature_ranges, df)
-    fig3.write_html(os.path.join(OUTPUT_DIR, 'interactive_nomogram_dashboard.html'))
-    fig3.write_image(os.path.join(OUTPUT_DIR, 'interactive_nomogram_dashboard.png'), scale=2)
-    print(f"    保存: {OUTPUT_DIR}/interactive_nomogram_dashboard.html")
+    # HTML 在子进程中写出 (--singlecore 时同步写出)
+    with HtmlWriter(singlecore=singlecore) as html_writer:
+        # 生成列线图
+        print("\n[3/5] 生成交互式列线图...")
+        fig1 = create_interactive_nomogram(model, scaler, feature_cols, feature_ranges)
+        html_writer.submit(fig1, os.path.join(OUTPUT_DIR, 'interactive_nomogram.html'))
+        print(f"    保存: {OUTPUT_DIR}/interactive_nomogram.html")
+    
+        # 校准曲线
+        print("\n[4/5] 生成校准曲线...")
+        fig2 = create_calibration_plot(model, scaler, X_all_scaled, y)
+        html_writer.submit(fig2, os.path.join(OUTPUT_DIR, 'interactive_calibration_nomogram.html'))
+        print(f"    保存: {OUTPUT_DIR}/interactive_calibration_nomogram.html")
+    
+        # 综合仪表板
+        print("\n[5/5] 生成综合分析仪表板...")
+        fig3 = create_comprehensive_nomogram_dashboard(model, scaler, feature_cols, feature_ranges, df)
+        html_writer.submit(fig3, os.path.join(OUTPUT_DIR, 'interactive_nomogram_dashboard.html'))
+        print(f"    保存: {OUTPUT_DIR}/interactive_nomogram_dashboard.html")
+    
+        # 静态图统一导出 (共用一个 Kaleido 会话)
+        save_static_batch([fig1, fig2, fig3],
+                          [os.path.join(OUTPUT_DIR, name) for name in (
+                              'interactive_nomogram.png',
+                              'interactive_calibration_nomogram.png',
+                              'interactive_nomogram_dashboard.png')],
+                          scale=2)
     
     print("\n" + "=" * 60)
     print("✅ 交互式列线图分析完成!")
@@ -614,4 +623,8 @@ def main():
 
 
 if __name__ == "__main__":
-    model, df = main()
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--singlecore', action='store_true', help='在主进程中同步写出 HTML')
+    args = parser.parse_args()
+    model, df = main(singlecore=args.singlecore)
@@ -29,26 +29,35 @@ warnings.filterwarnings('ignore')
 
 def generate_lead_toxicology_data(n_samples=2000, random_state=42):
     """生成铅毒性研究模拟数据集"""
-    np.random.seed(random_state)
-    
-    data = {
-        'Age': np.random.normal(45, 15, n_samples).clip(18, 80),
-        'Sex': np.random.binomial(1, 0.5, n_samples),
-        'BMI': np.random.normal(25, 4, n_samples).clip(15, 45),
-        'Blood_Lead_ug_dL': np.random.lognormal(2.5, 0.8, n_samples).clip(1, 80),
-        'Urine_Lead_ug_L': np.random.lognormal(3.0, 0.9, n_samples).clip(5, 200),
-        'Hair_Lead_ug_g': np.random.lognormal(1.5, 1.0, n_samples).clip(0.5, 50),
-        'SOD_U_mL': np.random.normal(120, 25, n_samples),
-        'GSH_umol_L': np.random.normal(8, 2, n_samples),
-        'MDA_umol_L': np.random.lognormal(1.2, 0.5, n_samples),
-        'CRP_mg_L': np.random.lognormal(1.0, 1.2, n_samples).clip(0.1, 50),
-        'IL6_pg_mL': np.random.lognormal(2.0, 0.8, n_samples).clip(1, 100),
-        'ALT_U_L': np.random.normal(25, 10, n_samples).clip(5, 200),
-        'Creatinine_umol_L': np.random.normal(80, 20, n_samples).clip(30, 200),
-        'DCA_umol_L': np.random.lognormal(2.0, 0.7, n_samples),
-        'LCA_umol_L': np.random.lognormal(1.0, 0.6, n_samples),
-        'Calprotectin_ug_g': np.random.lognormal(2.5, 1.0, n_samples).clip(10, 500),
-    }
+    rng = np.random.default_rng(random_state)
+    
+    # (列名, μ, σ, 是否对数正态, 下限, 上限) —— 一次抽取全部标准正态，再按列广播变换
+    specs = [
+        ('Age', 45, 15, False, 18, 80),
+        ('BMI', 25, 4, False, 15, 45),
+        ('Blood_Lead_ug_dL', 2.5, 0.8, True, 1, 80),
+        ('Urine_Lead_ug_L', 3.0, 0.9, True, 5, 200),
+        ('Hair_Lead_ug_g', 1.5, 1.0, True, 0.5, 50),
+        ('SOD_U_mL', 120, 25, False, -np.inf, np.inf),
+        ('GSH_umol_L', 8, 2, False, -np.inf, np.inf),
+        ('MDA_umol_L', 1.2, 0.5, True, -np.inf, np.inf),
+        ('CRP_mg_L', 1.0, 1.2, True, 0.1, 50),
+        ('IL6_pg_mL', 2.0, 0.8, True, 1, 100),
+        ('ALT_U_L', 25, 10, False, 5, 200),
+        ('Creatinine_umol_L', 80, 20, False, 30, 200),
+        ('DCA_umol_L', 2.0, 0.7, True, -np.inf, np.inf),
+        ('LCA_umol_L', 1.0, 0.6, True, -np.inf, np.inf),
+        ('Calprotectin_ug_g', 2.5, 1.0, True, 10, 500),
+    ]
+    names, mu, sigma, is_log, lower, upper = zip(*specs)
+    values = (np.array(mu)[:, None] +
+              np.array(sigma)[:, None] * rng.standard_normal((len(specs), n_samples)))
+    is_log = np.array(is_log)
+    values[is_log] = np.exp(values[is_log])
+    values = np.clip(values, np.array(lower)[:, None], np.array(upper)[:, None])
+    
+    data = dict(zip(names, values))
+    data = {'Age': data.pop('Age'), 'Sex': rng.binomial(1, 0.5, n_samples), **data}
     
     lead_risk = (
         0.4 * (data['Blood_Lead_ug_dL'] > 15).astype(int) +
@@ -57,7 +66,7 @@ def generate_lead_toxicology_data(n_samples=2000, random_state=42):
         0.2 * (data['CRP_mg_L'] > 5).astype(int) +
         0.2 * (data['Calprotectin_ug_g'] > 100).astype(int)
     )
-    lead_risk += np.random.normal(0, 0.3, n_samples)
+    lead_risk += rng.normal(0, 0.3, n_samples)
     data['Toxicity_Risk'] = (lead_risk > 1.5).astype(int)
     
     return pd.DataFrame(data)
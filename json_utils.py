@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+铅网络毒理学 - JSON 写出
+Lead Network Toxicology - JSON Output
+
+有 orjson 时用 orjson 序列化，否则回退到标准库 json；两者的分隔符与非 ASCII
+字符处理保持一致 (紧凑分隔符 / 缩进 2 格，原样输出 UTF-8)，写出的内容与是否安装 orjson 无关。
+
+用法:
+    from json_utils import dump_json
+    with open("a.json", "w", encoding="utf-8") as f:
+        dump_json(obj, f, indent=True)
+"""
+
+import json
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def dump_json(obj, f, indent=False):
+    """将 obj 序列化写入文本文件 f (indent=True 时缩进 2 格, 否则紧凑输出)"""
+    if HAS_ORJSON:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode())
+    elif indent:
+        json.dump(obj, f, indent=2, ensure_ascii=False)
+    else:
+        json.dump(obj, f, separators=(',', ':'), ensure_ascii=False)
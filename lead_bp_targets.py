@@ -11,11 +11,22 @@ Network Toxicology + Molecular Docking + Target Prediction
 
 import requests
 import json
+import asyncio
 import pandas as pd
 import numpy as np
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import os
 
+from http_cache import cache_file, load_cached, save_cached
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
 OUTPUT_DIR = "output"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
@@ -59,135 +70,333 @@ BLOOD_PRESSURE_TARGETS = {
     }
 }
 
+# UniProt/PDB 响应的本地缓存有效期 (http_cache)，7 天内重复查询不再访问网络
+HTTP_CACHE_TTL = 7 * 24 * 3600
+
 def get_protein_structure(uniprot_id):
     """从UniProt获取蛋白结构信息"""
+    url = f"https://rest.uniprot.org/uniprotkb/{uniprot_id}.json"
+    cache_path = cache_file(url)
+    cached = load_cached(cache_path, HTTP_CACHE_TTL)
+    if cached is not None:
+        return cached
     try:
-        url = f"https://rest.uniprot.org/uniprotkb/{uniprot_id}.json"
         response = requests.get(url, timeout=10)
         if response.status_code == 200:
             data = response.json()
+            save_cached(cache_path, data)
             return data
     except:
         pass
     return None
 
-def get_pdb_structure(gene_name):
-    """搜索PDB中的蛋白结构"""
+PDB_SEARCH_URL = "https://search.rcsb.org/rcsbsearch/v1/query"
+
+def _pdb_query(gene_name):
+    """PDB全文检索请求体"""
+    return {
+        "query": {
+            "type": "terminal",
+            "service": "text",
+            "parameters": {
+                "value": gene_name
+            }
+        },
+        "request_options": {
+            "return_num": 3
+        },
+        "sort": [{"sort_by": "score", "direction": "desc"}]
+    }
+
+def get_pdb_structure(gene_name, session=None):
+    """搜索PDB中的蛋白结构 (可传入共享的 requests.Session 复用连接)"""
+    http = session or requests
+    query = _pdb_query(gene_name)
+    cache_path = cache_file(PDB_SEARCH_URL, query)
+    cached = load_cached(cache_path, HTTP_CACHE_TTL)
+    if cached is not None:
+        return cached
     try:
-        url = "https://search.rcsb.org/rcsbsearch/v1/query"
-        query = {
-            "query": {
-                "type": "terminal",
-                "service": "text",
-                "parameters": {
-                    "value": gene_name
-                }
-            },
-            "request_options": {
-                "return_num": 3
-            },
-            "sort": [{"sort_by": "score", "direction": "desc"}]
-        }
-        response = requests.post(url, json=query, timeout=15)
+        response = http.post(PDB_SEARCH_URL, json=query, timeout=15)
         if response.status_code == 200:
-            return response.json()
+            data = response.json()
+            save_cached(cache_path, data)
+            return data
     except Exception as e:
         print(f"   PDB搜索错误: {e}")
     return None
 
-def predict_binding_sites(gene_name):
+async def get_pdb_structure_async(session, gene_name):
+    """异步搜索PDB中的蛋白结构 (aiohttp)"""
+    query = _pdb_query(gene_name)
+    cache_path = cache_file(PDB_SEARCH_URL, query)
+    cached = load_cached(cache_path, HTTP_CACHE_TTL)
+    if cached is not None:
+        return cached
+    try:
+        async with session.post(PDB_SEARCH_URL, json=query,
+                                timeout=aiohttp.ClientTimeout(total=15)) as response:
+            if response.status == 200:
+                data = await response.json(content_type=None)
+                save_cached(cache_path, data)
+                return data
+    except Exception as e:
+        print(f"   PDB搜索错误 ({gene_name}): {e}")
+    return None
+
+async def _fetch_pdb_structures_async(genes):
+    connector = aiohttp.TCPConnector(limit=16)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        return await asyncio.gather(*[get_pdb_structure_async(session, g) for g in genes])
+
+def fetch_pdb_structures(genes, max_workers=8):
+    """并发搜索多个基因的PDB结构，结果顺序与 genes 一致"""
+    if HAS_AIOHTTP:
+        return asyncio.run(_fetch_pdb_structures_async(genes))
+    # 无 aiohttp 时用线程池并发同步请求，共享 Session 以复用 TCP/TLS 连接
+    with requests.Session() as session, \
+            ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(genes)))) as pool:
+        return list(pool.map(partial(get_pdb_structure, session=session), genes))
+
+PDB_GRAPHQL_URL = "https://data.rcsb.org/graphql"
+PDB_GENE_ATTRIBUTE = "rcsb_entity_source_organism.rcsb_gene_name.value"
+PDB_ORGANISM_ATTRIBUTE = "rcsb_entity_source_organism.ncbi_scientific_name"
+PDB_ORGANISM = "Homo sapiens"
+
+# 按实体 ID 批量取基因名与条目标题
+PDB_ENTITY_QUERY = """
+query($ids: [String!]!) {
+  polymer_entities(entity_ids: $ids) {
+    rcsb_id
+    rcsb_polymer_entity_container_identifiers { entry_id }
+    rcsb_entity_source_organism { rcsb_gene_name { value } }
+    entry { struct { title } }
+  }
+}
+"""
+
+# 按条目 ID 批量取标题 (逐基因回退检索的结果只有条目 ID)
+PDB_ENTRY_TITLE_QUERY = """
+query($ids: [String!]!) {
+  entries(entry_ids: $ids) {
+    rcsb_id
+    struct { title }
+  }
+}
+"""
+
+def _post_json_cached(url, payload, timeout=30):
+    """POST JSON 并缓存响应，失败返回 None"""
+    cache_path = cache_file(url, payload)
+    cached = load_cached(cache_path, HTTP_CACHE_TTL)
+    if cached is not None:
+        return cached
+    try:
+        response = requests.post(url, json=payload, timeout=timeout)
+        if response.status_code == 200:
+            data = response.json()
+            save_cached(cache_path, data)
+            return data
+    except Exception as e:
+        print(f"   PDB批量查询错误: {e}")
+    return None
+
+def search_pdb_batch(genes, rows=500, per_gene=2, max_pages=10):
     """
-    预测蛋白的潜在结合位点
-    基于文献和已知位点数据库
+    一次检索多个基因的人源PDB结构 (基因名属性 + in 运算符，限定 Homo sapiens)
+
+    检索结果只含实体 ID，每页再用一次 GraphQL 请求取回基因名与标题，在本地按基因分组；
+    结构多的基因 (SOD1、CAT 等) 可能占满一页，因此逐页翻取，直到每个基因都有 per_gene 个条目
+    或结果取尽。返回 {基因: [{"rcsb_id", "title"}, ...]}；首页请求失败返回 None。
     """
-    
-    # 已知铅结合位点/功能域
-    known_bindings = {
-        # ACE - 金属蛋白，含锌离子结合位点
-        "ACE": {
-            "type": "Metalloproteinase",
-            "metal_binding": "Zn2+ (HEMICINE)",
-            "active_site": "HEXXH motif",
-            "inhibitors": "Captopril, Lisinopril (结合Zn2+位点)",
-            "pdb_available": True,
-            "note": "ACE抑制剂通过竞争性结合Zn2+位点发挥作用"
-        },
-        # NOS - 一氧化氮合酶
-        "NOS3": {
-            "type": "Oxidoreductase", 
-            "metal_binding": "Zn2+, Fe2+ (heme)",
-            "cofactor": "BH4 (四氢生物蝶呤)",
-            "inhibitors": "L-NAME, L-NMMA",
-            "pdb_available": True,
-            "note": "铅可能取代Zn2+或Fe2+，干扰NO合成"
-        },
-        # 肾素
-        "REN": {
-            "type": "Aspartic protease",
-            "active_site": "Aspartyl residue",
-            "inhibitors": "Aliskiren",
-            "pdb_available": True,
-            "note": "直接肾素抑制剂"
-        },
-        # AGT (血管紧张素原)
-        "AGT": {
-            "type": "Serpin family",
-            "cleavage_sites": ["Renin site", "ACE site"],
-            "pdb_available": True,
-            "note": "是肾素和ACE的底物"
-        },
-        # AGTR1 (血管紧张素II受体)
-        "AGTR1": {
-            "type": "GPCR (7TM)",
-            "signal": "Gq/11 protein",
-            "blockers": "Losartan, Valsartan (ARB类药物)",
-            "pdb_available": True,
-            "note": "AT1受体拮抗剂(沙坦类)是常用降压药"
-        },
-        # 炎症因子
-        "IL1B": {
-            "type": "Cytokine",
-            "receptor": "IL1R1/IL1R2",
-            "inhibitors": "Anakinra (IL-1受体拮抗剂)",
-            "pdb_available": True,
-            "note": "IL-1β阻断剂用于炎症治疗"
-        },
-        # 肿瘤坏死因子
-        "TNF": {
-            "type": "Cytokine",
-            "inhibitors": "Etanercept, Infliximab (TNF-α抑制剂)",
-            "pdb_available": True,
-            "note": "单克隆抗体用于自身免疫疾病"
-        },
-        # NFKB
-        "NFKB1": {
-            "type": "Transcription factor",
-            "inhibitors": "BAY 11-7082, IKK inhibitor",
-            "pdb_available": True,
-            "note": "NF-κB是炎症信号核心转录因子"
-        },
-        # SOD1
-        "SOD1": {
-            "type": "Oxidoreductase",
-            "metal_binding": "Cu+, Zn2+",
-            "mutations": "与肌萎缩侧索硬化相关",
-            "pdb_available": True,
-            "note": "铅可能取代Zn2+，导致SOD失活"
-        },
-        # CAT (过氧化氢酶)
-        "CAT": {
-            "type": "Oxidoreductase", 
-            "metal_binding": "Heme (Fe)",
-            "pdb_available": True,
-            "note": "铅可能干扰血红素合成"
+    wanted = {g.upper(): g for g in genes}
+    hits = defaultdict(list)
+    seen = defaultdict(set)
+    for page in range(max_pages):
+        query = {
+            "query": {
+                "type": "group",
+                "logical_operator": "and",
+                "nodes": [
+                    {"type": "terminal", "service": "text",
+                     "parameters": {"attribute": PDB_GENE_ATTRIBUTE, "operator": "in",
+                                    "value": list(genes)}},
+                    {"type": "terminal", "service": "text",
+                     "parameters": {"attribute": PDB_ORGANISM_ATTRIBUTE, "operator": "exact_match",
+                                    "value": PDB_ORGANISM}},
+                ]
+            },
+            "return_type": "polymer_entity",
+            "request_options": {"paginate": {"start": page * rows, "rows": rows}}
         }
+        result = _post_json_cached(PDB_SEARCH_URL, query)
+        if result is None:
+            return None if page == 0 else dict(hits)
+        entity_ids = [hit["identifier"] for hit in result.get("result_set", [])]
+        if not entity_ids:
+            break
+
+        details = _post_json_cached(PDB_GRAPHQL_URL, {"query": PDB_ENTITY_QUERY,
+                                                      "variables": {"ids": entity_ids}})
+        if details is None:
+            return None if page == 0 else dict(hits)
+        entities = {e["rcsb_id"]: e for e in (details.get("data") or {}).get("polymer_entities") or []}
+
+        # 按检索得分顺序分桶，每个基因保留前 per_gene 个不同条目
+        for entity_id in entity_ids:
+            entity = entities.get(entity_id)
+            if entity is None:
+                continue
+            entry_id = entity["rcsb_polymer_entity_container_identifiers"]["entry_id"]
+            title = ((entity.get("entry") or {}).get("struct") or {}).get("title") or ""
+            gene_names = {name["value"].upper()
+                          for organism in entity.get("rcsb_entity_source_organism") or []
+                          for name in organism.get("rcsb_gene_name") or []}
+            for name in gene_names & wanted.keys():
+                gene = wanted[name]
+                if len(hits[gene]) < per_gene and entry_id not in seen[gene]:
+                    seen[gene].add(entry_id)
+                    hits[gene].append({"rcsb_id": entry_id, "title": title})
+
+        if (all(len(hits[g]) >= per_gene for g in genes)
+                or (page + 1) * rows >= result.get("total_count", 0)):
+            break
+    return dict(hits)
+
+# 已知铅结合位点/功能域
+KNOWN_BINDINGS = {
+    # ACE - 金属蛋白，含锌离子结合位点
+    "ACE": {
+        "type": "Metalloproteinase",
+        "metal_binding": "Zn2+ (HEMICINE)",
+        "active_site": "HEXXH motif",
+        "inhibitors": "Captopril, Lisinopril (结合Zn2+位点)",
+        "pdb_available": True,
+        "note": "ACE抑制剂通过竞争性结合Zn2+位点发挥作用"
+    },
+    # NOS - 一氧化氮合酶
+    "NOS3": {
+        "type": "Oxidoreductase", 
+        "metal_binding": "Zn2+, Fe2+ (heme)",
+        "cofactor": "BH4 (四氢生物蝶呤)",
+        "inhibitors": "L-NAME, L-NMMA",
+        "pdb_available": True,
+        "note": "铅可能取代Zn2+或Fe2+，干扰NO合成"
+    },
+    # 肾素
+    "REN": {
+        "type": "Aspartic protease",
+        "active_site": "Aspartyl residue",
+        "inhibitors": "Aliskiren",
+        "pdb_available": True,
+        "note": "直接肾素抑制剂"
+    },
+    # AGT (血管紧张素原)
+    "AGT": {
+        "type": "Serpin family",
+        "cleavage_sites": ["Renin site", "ACE site"],
+        "pdb_available": True,
+        "note": "是肾素和ACE的底物"
+    },
+    # AGTR1 (血管紧张素II受体)
+    "AGTR1": {
+        "type": "GPCR (7TM)",
+        "signal": "Gq/11 protein",
+        "blockers": "Losartan, Valsartan (ARB类药物)",
+        "pdb_available": True,
+        "note": "AT1受体拮抗剂(沙坦类)是常用降压药"
+    },
+    # 炎症因子
+    "IL1B": {
+        "type": "Cytokine",
+        "receptor": "IL1R1/IL1R2",
+        "inhibitors": "Anakinra (IL-1受体拮抗剂)",
+        "pdb_available": True,
+        "note": "IL-1β阻断剂用于炎症治疗"
+    },
+    # 肿瘤坏死因子
+    "TNF": {
+        "type": "Cytokine",
+        "inhibitors": "Etanercept, Infliximab (TNF-α抑制剂)",
+        "pdb_available": True,
+        "note": "单克隆抗体用于自身免疫疾病"
+    },
+    # NFKB
+    "NFKB1": {
+        "type": "Transcription factor",
+        "inhibitors": "BAY 11-7082, IKK inhibitor",
+        "pdb_available": True,
+        "note": "NF-κB是炎症信号核心转录因子"
+    },
+    # SOD1
+    "SOD1": {
+        "type": "Oxidoreductase",
+        "metal_binding": "Cu+, Zn2+",
+        "mutations": "与肌萎缩侧索硬化相关",
+        "pdb_available": True,
+        "note": "铅可能取代Zn2+，导致SOD失活"
+    },
+    # CAT (过氧化氢酶)
+    "CAT": {
+        "type": "Oxidoreductase", 
+        "metal_binding": "Heme (Fe)",
+        "pdb_available": True,
+        "note": "铅可能干扰血红素合成"
     }
+}
+
+# 未收录基因的默认结合信息
+UNKNOWN_BINDING = {
+    "type": "Unknown",
+    "pdb_available": None,
+    "note": "需要进一步研究"
+}
+
+# 结合位点参考表 (模块加载时构建一次，按 Gene 与靶点表合并)
+_KNOWN_BINDINGS_DF = (pd.DataFrame.from_dict(KNOWN_BINDINGS, orient="index")
+                      .rename_axis("Gene").reset_index())
+
+def _build_key_targets_table():
+    """靶点表与结合位点参考表的左连接 (两者均为静态常量)"""
+    # 收集所有靶点 (按列累积，一次构建 DataFrame)
+    genes, pathways, descriptions, functions = [], [], [], []
+    for pathway, info in BLOOD_PRESSURE_TARGETS.items():
+        n_genes = len(info["genes"])
+        genes.extend(info["genes"])
+        pathways.extend([pathway] * n_genes)
+        descriptions.extend([info["description"]] * n_genes)
+        functions.extend([info["pathway"]] * n_genes)
+    
+    # 去重
+    df_targets = pd.DataFrame({
+        "Gene": genes,
+        "Pathway": pathways,
+        "Pathway_Description": descriptions,
+        "Function": functions,
+    }).drop_duplicates(subset=['Gene'])
     
-    return known_bindings.get(gene_name, {
-        "type": "Unknown",
-        "pdb_available": None,
-        "note": "需要进一步研究"
-    })
+    # 预测结合位点 (与参考表一次左连接，未收录基因填默认值)
+    df_full = df_targets.merge(_KNOWN_BINDINGS_DF, on="Gene", how="left")
+    unknown = ~df_full["Gene"].isin(KNOWN_BINDINGS)
+    df_full.loc[unknown, "type"] = UNKNOWN_BINDING["type"]
+    df_full.loc[unknown, "note"] = UNKNOWN_BINDING["note"]
+    
+    # 列顺序与逐基因构建时一致 (按首次出现的字段)
+    binding_cols = list(dict.fromkeys(
+        key for gene in df_full["Gene"]
+        for key in KNOWN_BINDINGS.get(gene, UNKNOWN_BINDING)))
+    df_full = df_full[list(df_targets.columns) + binding_cols]
+    return df_full
+
+# 参考表在模块加载时构建一次，analyze_key_targets 只复制结果
+_KEY_TARGETS_DF = _build_key_targets_table()
+
+def predict_binding_sites(gene_name):
+    """
+    预测蛋白的潜在结合位点
+    基于文献和已知位点数据库
+    """
+    return dict(KNOWN_BINDINGS.get(gene_name, UNKNOWN_BINDING))
 
 def analyze_key_targets():
     """分析关键靶点"""
@@ -196,30 +405,8 @@ def analyze_key_targets():
     print("🔬 铅诱导高血压关键靶点分析")
     print("="*60)
     
-    # 收集所有靶点
-    all_targets = []
-    for pathway, info in BLOOD_PRESSURE_TARGETS.items():
-        for gene in info["genes"]:
-            all_targets.append({
-                "Gene": gene,
-                "Pathway": pathway,
-                "Pathway_Description": info["description"],
-                "Function": info["pathway"]
-            })
-    
-    # 去重
-    df_targets = pd.DataFrame(all_targets).drop_duplicates(subset=['Gene'])
-    print(f"\n📊 识别到 {len(df_targets)} 个血压调控相关基因")
-    
-    # 预测结合位点
-    binding_info = []
-    for gene in df_targets["Gene"]:
-        info = predict_binding_sites(gene)
-        info["Gene"] = gene
-        binding_info.append(info)
-    
-    df_binding = pd.DataFrame(binding_info)
-    df_full = df_targets.merge(df_binding, on="Gene")
+    df_full = _KEY_TARGETS_DF.copy()
+    print(f"\n📊 识别到 {len(df_full)} 个血压调控相关基因")
     
     # 保存结果
     df_full.to_csv(f"{OUTPUT_DIR}/lead_bp_key_targets.csv", index=False)
@@ -231,18 +418,21 @@ def analyze_key_targets():
     
     priority_targets = ["ACE", "NOS3", "REN", "AGT", "AGTR1", "SOD1", "CAT", "IL1B", "TNF", "NFKB1"]
     
+    # Gene 已去重，按索引哈希查找
+    by_gene = df_full.set_index("Gene")
+    
     for gene in priority_targets:
-        row = df_full[df_full["Gene"] == gene]
-        if len(row) > 0:
-            row = row.iloc[0]
-            print(f"\n🔴 {gene} ({row['Pathway']})")
-            print(f"   类型: {row.get('type', 'N/A')}")
-            if pd.notna(row.get('metal_binding')):
-                print(f"   金属结合位点: {row['metal_binding']}")
-            if pd.notna(row.get('inhibitors')):
-                print(f"   现有抑制剂: {row['inhibitors']}")
-            if pd.notna(row.get('note')):
-                print(f"   备注: {row['note']}")
+        if gene not in by_gene.index:
+            continue
+        row = by_gene.loc[gene]
+        print(f"\n🔴 {gene} ({row['Pathway']})")
+        print(f"   类型: {row.get('type', 'N/A')}")
+        if pd.notna(row.get('metal_binding')):
+            print(f"   金属结合位点: {row['metal_binding']}")
+        if pd.notna(row.get('inhibitors')):
+            print(f"   现有抑制剂: {row['inhibitors']}")
+        if pd.notna(row.get('note')):
+            print(f"   备注: {row['note']}")
     
     return df_full
 
@@ -256,21 +446,38 @@ def search_pdb_structures():
     priority_genes = ["ACE", "NOS3", "REN", "AGT", "AGTR1", "IL1B", "SOD1", "CAT"]
     pdb_results = []
     
+    # 一次批量检索所有基因；批量结果中缺失的基因再逐个并发检索
+    hits = search_pdb_batch(priority_genes) or {}
+    missing = [g for g in priority_genes if not hits.get(g)]
+    if missing:
+        for gene, result in zip(missing, fetch_pdb_structures(missing)):
+            # 全文检索只返回条目 ID 列表 [{"identifier": ...}], 无标题
+            if result and result.get("result_set"):
+                hits[gene] = [{"rcsb_id": hit["identifier"]} for hit in result["result_set"][:2]]
+        # 回退结果的标题用一次 GraphQL 请求补齐；请求失败时标题留空
+        entry_ids = [s["rcsb_id"] for g in missing for s in hits.get(g, [])]
+        if entry_ids:
+            details = _post_json_cached(PDB_GRAPHQL_URL, {"query": PDB_ENTRY_TITLE_QUERY,
+                                                          "variables": {"ids": entry_ids}})
+            titles = {e["rcsb_id"]: ((e.get("struct") or {}).get("title") or "")
+                      for e in ((details or {}).get("data") or {}).get("entries") or []}
+            for g in missing:
+                for s in hits.get(g, []):
+                    s["title"] = titles.get(s["rcsb_id"], "")
+    
     for gene in priority_genes:
         print(f"\n搜索 {gene}...")
-        result = get_pdb_structure(gene)
-        if result and "result_set" in result:
-            structures = result.get("result_set", {}).get("results", [])
-            if structures:
-                for s in structures[:2]:  # 取前2个
-                    pdb_results.append({
-                        "Gene": gene,
-                        "PDB_ID": s.get("rcsb_id"),
-                        "Title": s.get("title", "")[:100]
-                    })
-                    print(f"   ✅ {s.get('rcsb_id')}: {s.get('title', '')[:50]}")
-            else:
-                print(f"   ❌ 无PDB结构")
+        structures = hits.get(gene)
+        if structures:
+            for s in structures[:2]:  # 取前2个
+                pdb_results.append({
+                    "Gene": gene,
+                    "PDB_ID": s.get("rcsb_id"),
+                    "Title": s.get("title", "")[:100]
+                })
+                print(f"   ✅ {s.get('rcsb_id')}: {s.get('title', '')[:50]}")
+        else:
+            print(f"   ❌ 无PDB结构")
     
     if pdb_results:
         df_pdb = pd.DataFrame(pdb_results)
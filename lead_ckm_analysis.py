@@ -9,16 +9,33 @@ Network Toxicology + CKM Syndrome Analysis
 3. 与代谢性疾病关联分析
 """
 
+from functools import reduce
+
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 from scipy import stats
 import warnings
 warnings.filterwarnings('ignore')
 
+from analyze_nhanes import cached_read_xport
+from statistical_tests import spearman_against
+
 # 配置
 DATA_DIR = "nhanes_data"
 OUTPUT_DIR = "output"
 
+# 合并后各列的存储类型: 生物标志物为 float32 (含缺失值)，0/1 标志与评分为 int8
+DTYPES = {
+    'Blood_Lead': 'float32', 'Blood_Cd': 'float32', 'Blood_Hg': 'float32',
+    'Blood_Se': 'float32', 'Blood_Mn': 'float32', 'Age': 'float32', 'Gender': 'float32',
+    'HDL': 'float32', 'Triglycerides': 'float32', 'HbA1c': 'float32',
+    'Diabetes_Doctor': 'float32', 'Hypertension': 'float32', 'Heart_Disease': 'float32',
+    'Kidney_Disease': 'float32', 'Stroke': 'float32',
+}
+FLAG_DTYPE = np.int8
+
 def main():
     print("="*60)
     print("🔬 铅与CKM综合征研究")
@@ -26,41 +43,45 @@ def main():
     
     # 1. 加载数据
     print("\n📂 加载数据...")
-    pbbcd = pd.read_sas(f"{DATA_DIR}/PBCD_L.xpt")
-    demo = pd.read_sas(f"{DATA_DIR}/DEMO_L.xpt")
-    mcq = pd.read_sas(f"{DATA_DIR}/MCQ_L.xpt")
-    hdl = pd.read_sas(f"{DATA_DIR}/HDL_L.xpt")
-    trigly = pd.read_sas(f"{DATA_DIR}/TRIGLY_L.xpt")
-    ghb = pd.read_sas(f"{DATA_DIR}/GHB_L.xpt")
+    # 首次运行将 XPT 转为 Parquet 缓存, 之后只按列读取所需变量
+    pbbcd = cached_read_xport(f"{DATA_DIR}/PBCD_L.xpt", ['SEQN', 'LBXBPB', 'LBXBCD', 'LBXTHG', 'LBXBSE', 'LBXBMN'])
+    demo = cached_read_xport(f"{DATA_DIR}/DEMO_L.xpt", ['SEQN', 'RIDAGEYR', 'RIAGENDR'])
+    mcq = cached_read_xport(f"{DATA_DIR}/MCQ_L.xpt", ['SEQN', 'MCQ010', 'MCQ160A', 'MCQ160B', 'MCQ160C', 'MCQ160D'])
+    hdl = cached_read_xport(f"{DATA_DIR}/HDL_L.xpt", ['SEQN', 'LBDHDD'])
+    trigly = cached_read_xport(f"{DATA_DIR}/TRIGLY_L.xpt", ['SEQN', 'LBXTLG'])
+    ghb = cached_read_xport(f"{DATA_DIR}/GHB_L.xpt", ['SEQN', 'LBXGH'])
     
     # 2. 合并数据
     print("📊 合并数据...")
-    df = pbbcd[['SEQN', 'LBXBPB', 'LBXBCD', 'LBXTHG', 'LBXBSE', 'LBXBMN']].copy()
-    df.columns = ['SEQN', 'Blood_Lead', 'Blood_Cd', 'Blood_Hg', 'Blood_Se', 'Blood_Mn']
+    # 源表读取时已按列投影，改名即可，无需复制
+    df = pbbcd.rename(columns={'LBXBPB': 'Blood_Lead',
+                               'LBXBCD': 'Blood_Cd',
+                               'LBXTHG': 'Blood_Hg',
+                               'LBXBSE': 'Blood_Se',
+                               'LBXBMN': 'Blood_Mn'})
     
-    # 合并人口统计
-    demo_sub = demo[['SEQN', 'RIDAGEYR', 'RIAGENDR']].copy()
-    demo_sub.columns = ['SEQN', 'Age', 'Gender']
-    df = df.merge(demo_sub, on='SEQN', how='left')
+    # 各来源表 (读取时已按列投影)
+    # 人口统计
+    demo_sub = demo.rename(columns={'RIDAGEYR': 'Age', 'RIAGENDR': 'Gender'})
     
-    # 合并血脂
-    hdl_sub = hdl[['SEQN', 'LBDHDD']].copy()
-    hdl_sub.columns = ['SEQN', 'HDL']
-    df = df.merge(hdl_sub, on='SEQN', how='left')
+    # 血脂
+    hdl_sub = hdl.rename(columns={'LBDHDD': 'HDL'})
     
-    trigly_sub = trigly[['SEQN', 'LBXTLG']].copy()
-    trigly_sub.columns = ['SEQN', 'Triglycerides']
-    df = df.merge(trigly_sub, on='SEQN', how='left')
+    trigly_sub = trigly.rename(columns={'LBXTLG': 'Triglycerides'})
     
-    # 合并血糖
-    ghb_sub = ghb[['SEQN', 'LBXGH']].copy()
-    ghb_sub.columns = ['SEQN', 'HbA1c']
-    df = df.merge(ghb_sub, on='SEQN', how='left')
+    # 血糖
+    ghb_sub = ghb.rename(columns={'LBXGH': 'HbA1c'})
     
-    # 合并问卷
-    mcq_sub = mcq[['SEQN', 'MCQ010', 'MCQ160A', 'MCQ160B', 'MCQ160C', 'MCQ160D']].copy()
-    mcq_sub.columns = ['SEQN', 'Diabetes_Doctor', 'Hypertension', 'Heart_Disease', 'Kidney_Disease', 'Stroke']
-    df = df.merge(mcq_sub, on='SEQN', how='left')
+    # 问卷
+    mcq_sub = mcq.rename(columns={'MCQ010': 'Diabetes_Doctor',
+                                  'MCQ160A': 'Hypertension',
+                                  'MCQ160B': 'Heart_Disease',
+                                  'MCQ160C': 'Kidney_Disease',
+                                  'MCQ160D': 'Stroke'})
+    
+    # 依次左连接到血铅表
+    df = reduce(lambda left, right: left.merge(right, on='SEQN', how='left'),
+                [demo_sub, hdl_sub, trigly_sub, ghb_sub, mcq_sub], df).astype(DTYPES)
     
     print(f"   合并后样本量: {len(df)}")
     
@@ -68,18 +89,18 @@ def main():
     print("\n📊 计算CKM综合征相关指标...")
     
     # 代谢综合征指标
-    df['High_TG'] = (df['Triglycerides'] >= 150).astype(float)
-    df['Low_HDL'] = np.where(df['Gender'] == 2, df['HDL'] < 50, df['HDL'] < 40).astype(float)
-    df['High_HbA1c'] = (df['HbA1c'] >= 5.7).astype(float)
+    df['High_TG'] = (df['Triglycerides'] >= 150).astype(FLAG_DTYPE)
+    df['Low_HDL'] = np.where(df['Gender'] == 2, df['HDL'] < 50, df['HDL'] < 40).astype(FLAG_DTYPE)
+    df['High_HbA1c'] = (df['HbA1c'] >= 5.7).astype(FLAG_DTYPE)
     
-    # 代谢综合征评分 (0-3)
-    df['MetS_Score'] = df['High_TG'].fillna(0) + df['Low_HDL'].fillna(0) + df['High_HbA1c'].fillna(0)
+    # 代谢综合征评分 (0-3); 缺失值的比较结果为 False, 各指标已是 0/1, 无需 fillna
+    df['MetS_Score'] = df['High_TG'] + df['Low_HDL'] + df['High_HbA1c']
     
     # 疾病状态
-    df['Hypertension'] = df['Hypertension'].fillna(0).replace({2: 0, 7: 0, 9: 0})
-    df['Diabetes'] = df['Diabetes_Doctor'].fillna(0).replace({2: 0, 7: 0, 9: 0})
-    df['Heart_Disease'] = df['Heart_Disease'].fillna(0).replace({2: 0, 7: 0, 9: 0})
-    df['Kidney_Disease'] = df['Kidney_Disease'].fillna(0).replace({2: 0, 7: 0, 9: 0})
+    # 问卷编码 1=是; 2=否, 7=拒答, 9=不知道, 缺失 均记为 0
+    df[['Hypertension', 'Diabetes', 'Heart_Disease', 'Kidney_Disease']] = (
+        df[['Hypertension', 'Diabetes_Doctor', 'Heart_Disease', 'Kidney_Disease']].to_numpy() == 1
+    ).astype(FLAG_DTYPE)
     
     # CKM风险评分 (0-7)
     df['CKM_Risk_Score'] = (
@@ -87,7 +108,7 @@ def main():
         df['Diabetes'] + 
         df['Heart_Disease'] + 
         df['Kidney_Disease'] + 
-        df['MetS_Score'].fillna(0)
+        df['MetS_Score']
     )
     
     # 4. 统计分析
@@ -106,16 +127,24 @@ def main():
     print(f"   P95: {df_clean['Blood_Lead'].quantile(0.95):.2f}")
     print(f"   P99: {df_clean['Blood_Lead'].quantile(0.99):.2f}")
     
-    # 按血铅分组
-    df_clean['Lead_Group'] = pd.cut(
-        df_clean['Blood_Lead'],
-        bins=[0, 5, 10, 50],
-        labels=['<5 μg/dL', '5-10 μg/dL', '>10 μg/dL'],
-        include_lowest=True
-    )
+    # 按血铅分组: [0, 5], (5, 10], (10, 50] 记为 0/1/2，超过 50 落入第 3 组、不计入
+    lead_labels = ['<5 μg/dL', '5-10 μg/dL', '>10 μg/dL']
+    lead_edges = np.array([5, 10, 50], dtype=np.float32)
+    lead_group = np.searchsorted(lead_edges, df_clean['Blood_Lead'].to_numpy(dtype=np.float32),
+                                 side='left').astype(np.int8)
+    score = df_clean['CKM_Risk_Score'].to_numpy()
+    
+    # 各组计数、均值、样本标准差 (bincount 一次归约)
+    n = np.bincount(lead_group, minlength=4)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(lead_group, weights=score, minlength=4) / n
+        sq_dev = np.bincount(lead_group, weights=(score - mean[lead_group]) ** 2, minlength=4)
+        std = np.sqrt(sq_dev / (n - 1))
+    n, mean, std = n[:3], mean[:3], std[:3]
     
     print(f"\n📊 不同血铅水平的CKM风险评分:")
-    ckm_by_lead = df_clean.groupby('Lead_Group')['CKM_Risk_Score'].agg(['mean', 'std', 'count'])
+    ckm_by_lead = pd.DataFrame({'mean': mean, 'std': std, 'count': n},
+                               index=pd.Index(lead_labels, name='Lead_Group'))
     print(ckm_by_lead)
     
     # 相关性分析
@@ -128,26 +157,37 @@ def main():
         ('Triglycerides', '甘油三酯'),
     ]
     
+    corr = spearman_against(df_clean, 'Blood_Lead', [col for col, _ in pairs])
     results = []
     for col, name in pairs:
-        data = df_clean[['Blood_Lead', col]].dropna()
-        if len(data) > 100:
-            r, p = stats.spearmanr(data['Blood_Lead'], data[col])
+        if corr.at[col, 'n'] > 100:
+            r, p = corr.at[col, 'r'], corr.at[col, 'p_value']
             sig = "***" if p < 0.001 else "**" if p < 0.01 else "*" if p < 0.05 else "NS"
             print(f"   铅 vs {name}: r={r:.3f}, p={p:.4f} {sig}")
             results.append({'指标': name, 'Spearman_r': round(r, 3), 'p_value': p, '显著性': sig})
     
     # 回归分析
     print(f"\n📊 线性回归 (血铅对CKM风险的影响):")
-    X = df_clean['Blood_Lead'].fillna(0)
-    y = df_clean['CKM_Risk_Score'].fillna(0)
-    slope, intercept, r_value, p_value, std_err = stats.linregress(X, y)
+    # df_clean 已剔除两列缺失，直接用闭式 OLS
+    x = df_clean['Blood_Lead'].to_numpy(dtype=float)
+    y = df_clean['CKM_Risk_Score'].to_numpy(dtype=float)
+    dx = x - x.mean()
+    dy = y - y.mean()
+    sxx, sxy, syy = dx @ dx, dx @ dy, dy @ dy
+    slope = sxy / sxx
+    intercept = y.mean() - slope * x.mean()
+    r_value = sxy / np.sqrt(sxx * syy)
+    dof = len(x) - 2
+    t_stat = r_value * np.sqrt(dof / ((1 - r_value) * (1 + r_value)))
+    p_value = 2 * stats.t.sf(abs(t_stat), dof)
     print(f"   β = {slope:.4f}, p = {p_value:.4f}")
     print(f"   R² = {r_value**2:.4f}")
     
     # 5. 保存结果
     results_df = pd.DataFrame(results)
-    df.to_csv(f"{OUTPUT_DIR}/lead_ckm_full.csv", index=False)
+    # 宽表用 Arrow 的 C++ CSV 写出器 (列名不加引号，与 pandas 输出的表头一致)
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), f"{OUTPUT_DIR}/lead_ckm_full.csv",
+                     write_options=pa_csv.WriteOptions(quoting_header="none"))
     results_df.to_csv(f"{OUTPUT_DIR}/lead_ckm_correlations.csv", index=False)
     
     print(f"\n✅ 分析完成!")
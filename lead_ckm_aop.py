@@ -9,15 +9,27 @@ Lead + CKM Syndrome - Adverse Outcome Pathway Framework
 3. 识别各阶段的关键事件(KEs)
 """
 
-import pandas as pd
 import numpy as np
-from scipy import stats
+import pyarrow as pa
+import pyarrow.csv as pa_csv
 import warnings
 warnings.filterwarnings('ignore')
 
+from analyze_nhanes import cached_read_xport
+from statistical_tests import spearman_against
+
 DATA_DIR = "nhanes_data"
 OUTPUT_DIR = "output"
 
+# 合并后各列的存储类型: 生物标志物为 float32 (含缺失值)，0/1 标志与分期为 int8
+DTYPES = {
+    'Blood_Lead': 'float32', 'Age': 'float32', 'Gender': 'float32',
+    'SBP': 'float32', 'DBP': 'float32', 'BMI': 'float32', 'Waist': 'float32',
+    'HDL': 'float32', 'TG': 'float32', 'HbA1c': 'float32',
+    'DM_Dx': 'float32', 'HTN_Dx': 'float32', 'CKD_Dx': 'float32',
+}
+FLAG_DTYPE = np.int8
+
 def main():
     print("="*60)
     print("🔬 铅与CKM综合征 - AOP框架构建")
@@ -25,104 +37,100 @@ def main():
     
     # 加载数据
     print("\n📂 加载数据...")
-    pbbcd = pd.read_sas(f"{DATA_DIR}/PBCD_L.xpt")
-    demo = pd.read_sas(f"{DATA_DIR}/DEMO_L.xpt")
-    bpxo = pd.read_sas(f"{DATA_DIR}/BPXO_L.xpt")
-    bmx = pd.read_sas(f"{DATA_DIR}/BMX_L.xpt")
-    hdl = pd.read_sas(f"{DATA_DIR}/HDL_L.xpt")
-    trigly = pd.read_sas(f"{DATA_DIR}/TRIGLY_L.xpt")
-    ghb = pd.read_sas(f"{DATA_DIR}/GHB_L.xpt")
-    mcq = pd.read_sas(f"{DATA_DIR}/MCQ_L.xpt")
-    
-    # 合并数据
-    df = pbbcd[['SEQN', 'LBXBPB']].copy()
-    df.columns = ['SEQN', 'Blood_Lead']
-    
-    demo_sub = demo[['SEQN', 'RIDAGEYR', 'RIAGENDR']].copy()
-    demo_sub.columns = ['SEQN', 'Age', 'Gender']
+    # 首次运行将 XPT 转为 Parquet 缓存, 之后只按列读取所需变量
+    pbbcd = cached_read_xport(f"{DATA_DIR}/PBCD_L.xpt", ['SEQN', 'LBXBPB'])
+    demo = cached_read_xport(f"{DATA_DIR}/DEMO_L.xpt", ['SEQN', 'RIDAGEYR', 'RIAGENDR'])
+    bpxo = cached_read_xport(f"{DATA_DIR}/BPXO_L.xpt", ['SEQN', 'BPXOSY1', 'BPXODI1'])
+    bmx = cached_read_xport(f"{DATA_DIR}/BMX_L.xpt", ['SEQN', 'BMXBMI', 'BMXWAIST'])
+    hdl = cached_read_xport(f"{DATA_DIR}/HDL_L.xpt", ['SEQN', 'LBDHDD'])
+    trigly = cached_read_xport(f"{DATA_DIR}/TRIGLY_L.xpt", ['SEQN', 'LBXTLG'])
+    ghb = cached_read_xport(f"{DATA_DIR}/GHB_L.xpt", ['SEQN', 'LBXGH'])
+    mcq = cached_read_xport(f"{DATA_DIR}/MCQ_L.xpt", ['SEQN', 'MCQ010', 'MCQ160A', 'MCQ160B', 'MCQ160C', 'MCQ160D'])
+    
+    # 合并数据 (源表读取时已按列投影，改名即可，无需复制)
+    df = pbbcd.rename(columns={'LBXBPB': 'Blood_Lead'})
+    
+    demo_sub = demo.rename(columns={'RIDAGEYR': 'Age', 'RIAGENDR': 'Gender'})
     df = df.merge(demo_sub, on='SEQN', how='left')
     
-    bpxo_sub = bpxo[['SEQN', 'BPXOSY1', 'BPXODI1']].copy()
-    bpxo_sub.columns = ['SEQN', 'SBP', 'DBP']
+    bpxo_sub = bpxo.rename(columns={'BPXOSY1': 'SBP', 'BPXODI1': 'DBP'})
     df = df.merge(bpxo_sub, on='SEQN', how='left')
     
-    bmx_sub = bmx[['SEQN', 'BMXBMI', 'BMXWAIST']].copy()
-    bmx_sub.columns = ['SEQN', 'BMI', 'Waist']
+    bmx_sub = bmx.rename(columns={'BMXBMI': 'BMI', 'BMXWAIST': 'Waist'})
     df = df.merge(bmx_sub, on='SEQN', how='left')
     
-    hdl_sub = hdl[['SEQN', 'LBDHDD']].copy()
-    hdl_sub.columns = ['SEQN', 'HDL']
+    hdl_sub = hdl.rename(columns={'LBDHDD': 'HDL'})
     df = df.merge(hdl_sub, on='SEQN', how='left')
     
-    trigly_sub = trigly[['SEQN', 'LBXTLG']].copy()
-    trigly_sub.columns = ['SEQN', 'TG']
+    trigly_sub = trigly.rename(columns={'LBXTLG': 'TG'})
     df = df.merge(trigly_sub, on='SEQN', how='left')
     
-    ghb_sub = ghb[['SEQN', 'LBXGH']].copy()
-    ghb_sub.columns = ['SEQN', 'HbA1c']
+    ghb_sub = ghb.rename(columns={'LBXGH': 'HbA1c'})
     df = df.merge(ghb_sub, on='SEQN', how='left')
     
-    mcq_sub = mcq[['SEQN', 'MCQ010', 'MCQ160A', 'MCQ160B', 'MCQ160C', 'MCQ160D']].copy()
-    mcq_sub.columns = ['SEQN', 'DM_Dx', 'HTN_Dx', 'CHD', 'CKD_Dx', 'Stroke']
-    df = df.merge(mcq_sub, on='SEQN', how='left')
+    mcq_sub = mcq.rename(columns={'MCQ010': 'DM_Dx',
+                                  'MCQ160A': 'HTN_Dx',
+                                  'MCQ160B': 'CHD',
+                                  'MCQ160C': 'CKD_Dx',
+                                  'MCQ160D': 'Stroke'})
+    df = df.merge(mcq_sub, on='SEQN', how='left').astype(DTYPES)
     
     # 计算指标
-    df['High_Waist'] = np.where(df['Gender']==2, df['Waist']>80, df['Waist']>90).astype(float)
-    df['High_TG'] = (df['TG'] >= 150).astype(float)
-    df['Low_HDL'] = np.where(df['Gender']==2, df['HDL']<50, df['HDL']<40).astype(float)
-    df['High_BP'] = ((df['SBP']>=130) | (df['DBP']>=85)).astype(float)
-    df['High_HbA1c'] = (df['HbA1c']>=5.7).astype(float)
+    # 代谢危险因素: 一次构建 (n, 5) 标志矩阵; 缺失值比较结果为 False, 即记为 0
+    waist, tg, hdl_c, sbp, dbp, hba1c = df[['Waist', 'TG', 'HDL', 'SBP', 'DBP', 'HbA1c']].to_numpy().T
+    female = df['Gender'].to_numpy() == 2
+    mets_cols = ['High_Waist', 'High_TG', 'Low_HDL', 'High_BP', 'High_HbA1c']
+    mets_flags = np.column_stack([
+        np.where(female, waist > 80, waist > 90),
+        tg >= 150,
+        np.where(female, hdl_c < 50, hdl_c < 40),
+        (sbp >= 130) | (dbp >= 85),
+        hba1c >= 5.7,
+    ]).astype(FLAG_DTYPE)
+    df[mets_cols] = mets_flags
     
     # 代谢综合征
-    df['MetS'] = df['High_Waist'].fillna(0) + df['High_TG'].fillna(0) + df['Low_HDL'].fillna(0) + df['High_BP'].fillna(0) + df['High_HbA1c'].fillna(0)
+    df['MetS'] = mets_flags.sum(axis=1, dtype=FLAG_DTYPE)
     
     # 疾病状态
-    df['HTN'] = df['HTN_Dx'].fillna(0).replace({2:0,7:0,9:0})
-    df['DM'] = df['DM_Dx'].fillna(0).replace({2:0,7:0,9:0})
-    df['CHD'] = df['CHD'].fillna(0).replace({2:0,7:0,9:0})
-    df['CKD'] = df['CKD_Dx'].fillna(0).replace({2:0,7:0,9:0})
-    df['Stroke'] = df['Stroke'].fillna(0).replace({2:0,7:0,9:0})
+    # 问卷编码 1=是; 2=否, 7=拒答, 9=不知道, 缺失 均记为 0
+    df[['HTN', 'DM', 'CHD', 'CKD', 'Stroke']] = (
+        df[['HTN_Dx', 'DM_Dx', 'CHD', 'CKD_Dx', 'Stroke']].to_numpy() == 1).astype(FLAG_DTYPE)
     
     # eGFR估算 (简化版 - 需要肌酐数据)
     # 使用血压作为肾功能的代理指标
     
     # CKM分期 (基于AHA标准)
-    def get_ckm_stage(row):
-        """
-        CKM分期定义:
-        0期: 无代谢危险因素
-        1期: 代谢危险因素积累 (MetS 1-2项)
-        2期: 代谢性疾病 (MetS≥3 或 糖尿病)
-        3期: 亚临床CVD/CKD
-        4期: 临床CVD/CKD
-        """
-        # 4期: 已有临床CVD或CKD
-        if row['CHD'] == 1 or row['CKD'] == 1 or row['Stroke'] == 1:
-            return 4
-        # 3期: 亚临床 - 高血压+糖尿病
-        if row['HTN'] == 1 and row['DM'] == 1:
-            return 3
-        # 2期: 代谢性疾病
-        if row['DM'] == 1 or row['MetS'] >= 3:
-            return 2
-        # 1期: 代谢危险因素
-        if row['MetS'] >= 1:
-            return 1
-        # 0期: 无危险因素
-        return 0
-    
-    df['CKM_Stage'] = df.apply(get_ckm_stage, axis=1)
+    # 0期: 无代谢危险因素
+    # 1期: 代谢危险因素积累 (MetS 1-2项)
+    # 2期: 代谢性疾病 (MetS≥3 或 糖尿病)
+    # 3期: 亚临床CVD/CKD
+    # 4期: 临床CVD/CKD
+    # 按优先级从高到低匹配，在 int8 原始数组上整列一次计算
+    chd, ckd, stroke, htn, dm, mets = df[['CHD', 'CKD', 'Stroke', 'HTN', 'DM', 'MetS']].to_numpy().T
+    ckm_conditions = [
+        (chd == 1) | (ckd == 1) | (stroke == 1),  # 4期: 已有临床CVD或CKD
+        (htn == 1) & (dm == 1),                   # 3期: 亚临床 - 高血压+糖尿病
+        (dm == 1) | (mets >= 3),                  # 2期: 代谢性疾病
+        mets >= 1,                                # 1期: 代谢危险因素
+    ]
+    df['CKM_Stage'] = np.select(ckm_conditions, np.array([4, 3, 2, 1], dtype=FLAG_DTYPE),
+                                default=0).astype(FLAG_DTYPE, copy=False)
     
     # 分析
     df_clean = df.dropna(subset=['Blood_Lead'])
     print(f"样本量: {len(df_clean)}")
     
+    # 各项分期统计共用的数组，只取一次
+    lead = df_clean['Blood_Lead'].to_numpy()
+    stage = df_clean['CKM_Stage'].to_numpy()
+    stage_counts = np.bincount(stage, minlength=5)
+    
     print("\n" + "="*60)
     print("📊 CKM分期分布")
     print("="*60)
     
-    stage_dist = df_clean['CKM_Stage'].value_counts().sort_index()
-    stage_pct = (stage_dist / len(df_clean) * 100).round(1)
+    stage_pct = np.round(stage_counts / len(df_clean) * 100, 1)
     
     stage_names = {
         0: "0期 (无危险因素)",
@@ -132,10 +140,8 @@ def main():
         4: "4期 (临床CVD/CKD)"
     }
     
-    for stage in range(5):
-        count = stage_dist.get(stage, 0)
-        pct = stage_pct.get(stage, 0)
-        print(f"   {stage_names[stage]}: {count} ({pct}%)")
+    for s in range(5):
+        print(f"   {stage_names[s]}: {stage_counts[s]} ({stage_pct[s]}%)")
     
     print("\n" + "="*60)
     print("📊 铅与CKM各期的关联分析")
@@ -144,19 +150,18 @@ def main():
     # 各期的血铅水平
     print("\n各CKM期的血铅水平 (μg/dL):")
     lead_by_stage = df_clean.groupby('CKM_Stage')['Blood_Lead'].agg(['mean', 'median', 'std', 'count'])
-    for stage in range(5):
-        if stage in lead_by_stage.index:
-            row = lead_by_stage.loc[stage]
-            print(f"   {stage_names[stage]}: 均值={row['mean']:.2f}, 中位数={row['median']:.2f}, n={int(row['count'])}")
+    for s in range(5):
+        if s in lead_by_stage.index:
+            row = lead_by_stage.loc[s]
+            print(f"   {stage_names[s]}: 均值={row['mean']:.2f}, 中位数={row['median']:.2f}, n={int(row['count'])}")
     
     # 各期的高铅暴露比例
     print("\n各CKM期的高血铅比例 (>5 μg/dL):")
-    for stage in range(5):
-        stage_data = df_clean[df_clean['CKM_Stage'] == stage]
-        if len(stage_data) > 0:
-            high_lead = (stage_data['Blood_Lead'] > 5).sum()
-            pct = high_lead / len(stage_data) * 100
-            print(f"   {stage_names[stage]}: {pct:.1f}%")
+    high_lead_counts = np.bincount(stage, weights=lead > 5, minlength=5)
+    for s in range(5):
+        if stage_counts[s] > 0:
+            pct = high_lead_counts[s] / stage_counts[s] * 100
+            print(f"   {stage_names[s]}: {pct:.1f}%")
     
     # 相关性分析
     print("\n" + "="*60)
@@ -174,15 +179,17 @@ def main():
         ('SBP', '收缩压'),
     ]
     
+    corr = spearman_against(df_clean, 'Blood_Lead', [col for col, _ in pairs])
     for col, name in pairs:
-        data = df_clean[['Blood_Lead', col]].dropna()
-        if len(data) > 100:
-            r, p = stats.spearmanr(data['Blood_Lead'], data[col])
+        if corr.at[col, 'n'] > 100:
+            r, p = corr.at[col, 'r'], corr.at[col, 'p_value']
             sig = "***" if p<0.001 else "**" if p<0.01 else "*" if p<0.05 else ""
             print(f"   铅 vs {name}: r={r:.3f}, p={p:.2e} {sig}")
     
     # 保存
-    df.to_csv(f"{OUTPUT_DIR}/lead_ckm_aop.csv", index=False)
+    # 宽表用 Arrow 的 C++ CSV 写出器 (列名不加引号，与 pandas 输出的表头一致)
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), f"{OUTPUT_DIR}/lead_ckm_aop.csv",
+                     write_options=pa_csv.WriteOptions(quoting_header="none"))
     
     print("\n" + "="*60)
     print("💡 AOP框架总结")
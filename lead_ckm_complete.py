@@ -11,10 +11,12 @@ Network Toxicology + CKM Syndrome + Mediation Analysis
 
 import pandas as pd
 import numpy as np
-from scipy import stats
 import warnings
 warnings.filterwarnings('ignore')
 
+from lead_ckm_core import build_ckm_frame, mediation_analysis
+from statistical_tests import spearman_against
+
 # 配置
 DATA_DIR = "nhanes_data"
 OUTPUT_DIR = "output"
@@ -25,145 +27,11 @@ def main():
     print(" Mediation Analysis + Complete CKM Score")
     print("="*60)
     
-    # 1. 加载数据
+    # 1. 加载并合并数据, 计算CKM指标 (与 lead_ckm_final 共用 lead_ckm_core)
     print("\n📂 加载数据...")
+    df = build_ckm_frame(DATA_DIR, verbose=True)
     
-    # 血重金属
-    pbbcd = pd.read_sas(f"{DATA_DIR}/PBCD_L.xpt")
-    
-    # 人口统计
-    demo = pd.read_sas(f"{DATA_DIR}/DEMO_L.xpt")
-    
-    # 体检数据 (血压+身体测量)
-    bpxo = pd.read_sas(f"{DATA_DIR}/BPXO_L.xpt")  # 血压
-    bmx = pd.read_sas(f"{DATA_DIR}/BMX_L.xpt")    # 身体测量
-    
-    # 生化指标
-    hdl = pd.read_sas(f"{DATA_DIR}/HDL_L.xpt")
-    trigly = pd.read_sas(f"{DATA_DIR}/TRIGLY_L.xpt")
-    ghb = pd.read_sas(f"{DATA_DIR}/GHB_L.xpt")
-    
-    # 问卷
-    mcq = pd.read_sas(f"{DATA_DIR}/MCQ_L.xpt")
-    
-    print("   数据加载完成!")
-    
-    # 2. 合并数据
-    print("\n📊 合并数据...")
-    
-    df = pbbcd[['SEQN', 'LBXBPB', 'LBXBCD', 'LBXTHG', 'LBXBSE', 'LBXBMN']].copy()
-    df.columns = ['SEQN', 'Blood_Lead', 'Blood_Cd', 'Blood_Hg', 'Blood_Se', 'Blood_Mn']
-    
-    # 人口统计
-    demo_sub = demo[['SEQN', 'RIDAGEYR', 'RIAGENDR']].copy()
-    demo_sub.columns = ['SEQN', 'Age', 'Gender']
-    df = df.merge(demo_sub, on='SEQN', how='left')
-    
-    # 血压 (收缩压/舒张压)
-    bpxo_sub = bpxo[['SEQN', 'BPXOSY1', 'BPXODI1']].copy()
-    bpxo_sub.columns = ['SEQN', 'SBP', 'DBP']
-    df = df.merge(bpxo_sub, on='SEQN', how='left')
-    
-    # 身体测量 (BMI, 腰围)
-    bmx_sub = bmx[['SEQN', 'BMXBMI', 'BMXWAIST']].copy()
-    bmx_sub.columns = ['SEQN', 'BMI', 'Waist_Circumference']
-    df = df.merge(bmx_sub, on='SEQN', how='left')
-    
-    # 血脂
-    hdl_sub = hdl[['SEQN', 'LBDHDD']].copy()
-    hdl_sub.columns = ['SEQN', 'HDL']
-    df = df.merge(hdl_sub, on='SEQN', how='left')
-    
-    trigly_sub = trigly[['SEQN', 'LBXTLG']].copy()
-    trigly_sub.columns = ['SEQN', 'Triglycerides']
-    df = df.merge(trigly_sub, on='SEQN', how='left')
-    
-    # 血糖
-    ghb_sub = ghb[['SEQN', 'LBXGH']].copy()
-    ghb_sub.columns = ['SEQN', 'HbA1c']
-    df = df.merge(ghb_sub, on='SEQN', how='left')
-    
-    # 问卷 (疾病史)
-    mcq_sub = mcq[['SEQN', 'MCQ010', 'MCQ160A', 'MCQ160B', 'MCQ160C', 'MCQ160D']].copy()
-    mcq_sub.columns = ['SEQN', 'Diabetes_Doctor', 'Hypertension_Dx', 'Heart_Disease', 'Kidney_Disease', 'Stroke']
-    df = df.merge(mcq_sub, on='SEQN', how='left')
-    
-    print(f"   合并后样本量: {len(df)}")
-    
-    # 3. 计算CKM指标
-    print("\n📊 计算CKM综合征相关指标...")
-    
-    # 3.1 代谢综合征指标 (根据NCEP-ATP III标准)
-    # 腰围增大 (亚洲人标准: 男>90cm, 女>80cm)
-    df['High_Waist'] = np.where(
-        df['Gender'] == 2,  # 女性
-        df['Waist_Circumference'] > 80,
-        df['Waist_Circumference'] > 90
-    ).astype(float)
-    
-    # 甘油三酯 ≥ 150 mg/dL
-    df['High_TG'] = (df['Triglycerides'] >= 150).astype(float)
-    
-    # HDL < 40 mg/dL (男) 或 <50 mg/dL (女)
-    df['Low_HDL'] = np.where(
-        df['Gender'] == 2,
-        df['HDL'] < 50,
-        df['HDL'] < 40
-    ).astype(float)
-    
-    # 血压 ≥ 130/85 mmHg
-    df['High_BP'] = ((df['SBP'] >= 130) | (df['DBP'] >= 85)).astype(float)
-    
-    # 空腹血糖 ≥ 100 mg/dL (使用HbA1c ≥ 5.7% 作为糖尿病前期)
-    df['High_Glucose'] = (df['HbA1c'] >= 5.7).astype(float)
-    
-    # 代谢综合征评分 (0-5)
-    df['MetS_Score'] = (
-        df['High_Waist'].fillna(0) +
-        df['High_TG'].fillna(0) + 
-        df['Low_HDL'].fillna(0) + 
-        df['High_BP'].fillna(0) + 
-        df['High_Glucose'].fillna(0)
-    )
-    
-    # 3.2 TyG指数 (甘油三酯-葡萄糖指数) - 胰岛素抵抗指标
-    # TyG = ln(甘油三酯 × 葡萄糖 / 2)
-    df['TyG_Index'] = np.log(df['Triglycerides'] * df['HbA1c'] / 2)
-    
-    # 3.3 心血管-肾脏疾病史
-    df['Hypertension'] = df['Hypertension_Dx'].fillna(0).replace({2: 0, 7: 0, 9: 0})
-    df['Diabetes'] = df['Diabetes_Doctor'].fillna(0).replace({2: 0, 7: 0, 9: 0})
-    df['Heart_Disease'] = df['Heart_Disease'].fillna(0).replace({2: 0, 7: 0, 9: 0})
-    df['Kidney_Disease'] = df['Kidney_Disease'].fillna(0).replace({2: 0, 7: 0, 9: 0})
-    
-    # 3.4 CKM综合风险评分 (0-10)
-    df['CKM_Risk_Score'] = (
-        df['Hypertension'] + 
-        df['Diabetes'] + 
-        df['Heart_Disease'] + 
-        df['Kidney_Disease'] + 
-        df['MetS_Score'].fillna(0)
-    )
-    
-    # 3.5 CKM分期 (基于AHA标准)
-    # 0期: 无CKM风险因素
-    # 1期: 代谢危险因素积累 (肥胖、糖尿病前期)
-    # 2期: 代谢性疾病 (糖尿病、高血压、血脂异常)
-    # 3期: 亚临床CVD/CKD
-    # 4期: 临床CVD/CKD
-    def get_ckm_stage(row):
-        score = 0
-        if row['MetS_Score'] >= 3 or row['Diabetes'] == 1:
-            score += 2
-        elif row['MetS_Score'] >= 1:
-            score += 1
-        if row['Heart_Disease'] == 1 or row['Kidney_Disease'] == 1:
-            score += 2
-        return min(score, 4)
-    
-    df['CKM_Stage'] = df.apply(get_ckm_stage, axis=1)
-    
-    # 4. 统计分析
+    # 2. 统计分析
     print("\n" + "="*60)
     print("📊 分析结果")
     print("="*60)
@@ -182,23 +50,36 @@ def main():
     print(f"   P95: {df_clean['Blood_Lead'].quantile(0.95):.2f}")
     print(f"   P99: {df_clean['Blood_Lead'].quantile(0.99):.2f}")
     
-    # 按血铅分组
-    df_clean['Lead_Group'] = pd.cut(
-        df_clean['Blood_Lead'],
-        bins=[0, 3, 5, 10, 50],
-        labels=['<3 μg/dL', '3-5 μg/dL', '5-10 μg/dL', '>10 μg/dL'],
-        include_lowest=True
-    )
+    # 按血铅分组: [0, 3], (3, 5], (5, 10], (10, 50] 记为 0-3，超过 50 落入第 4 组、不计入
+    lead_labels = ['<3 μg/dL', '3-5 μg/dL', '5-10 μg/dL', '>10 μg/dL']
+    lead_edges = np.array([3, 5, 10, 50], dtype=np.float32)
+    lead_group = np.searchsorted(lead_edges, df_clean['Blood_Lead'].to_numpy(dtype=np.float32),
+                                 side='left').astype(np.int8)
+    score = df_clean['CKM_Risk_Score'].to_numpy(dtype=np.float64)
+    lead_index = pd.Index(lead_labels, name='Lead_Group')
+    
+    # 各组计数、均值、样本标准差 (bincount 一次归约)
+    n = np.bincount(lead_group, minlength=5)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(lead_group, weights=score, minlength=5) / n
+        sq_dev = np.bincount(lead_group, weights=(score - mean[lead_group]) ** 2, minlength=5)
+        std = np.sqrt(sq_dev / (n - 1))
     
     print(f"\n📊 不同血铅水平的CKM风险评分:")
-    ckm_by_lead = df_clean.groupby('Lead_Group')['CKM_Risk_Score'].agg(['mean', 'std', 'count'])
+    ckm_by_lead = pd.DataFrame({'mean': mean[:4], 'std': std[:4], 'count': n[:4]}, index=lead_index)
     print(ckm_by_lead)
     
+    # 血铅组 × CKM分期 的二维计数，按行归一化为百分比
     print(f"\n📊 不同血铅水平的CKM分期分布:")
-    stage_by_lead = pd.crosstab(df_clean['Lead_Group'], df_clean['CKM_Stage'], normalize='index') * 100
+    stage = df_clean['CKM_Stage'].to_numpy(dtype=np.int64)
+    counts = np.bincount(lead_group * 5 + stage, minlength=25).reshape(5, 5)[:4]
+    observed = counts.sum(axis=0) > 0
+    stage_by_lead = pd.DataFrame(counts[:, observed] / n[:4, None] * 100, index=lead_index,
+                                 columns=pd.Index(np.flatnonzero(observed), name='CKM_Stage'))
+    stage_by_lead = stage_by_lead[n[:4] > 0]
     print(stage_by_lead.round(1))
     
-    # 5. 相关性分析
+    # 3. 相关性分析
     print(f"\n" + "="*60)
     print("📊 血铅与CKM指标的相关性 (Spearman)")
     print("="*60)
@@ -215,11 +96,12 @@ def main():
         ('Waist_Circumference', '腰围'),
     ]
     
+    # 血铅只排秩一次，各指标按成对完整样本计算
+    corr = spearman_against(df_clean, 'Blood_Lead', [col for col, _ in pairs])
     results = []
     for col, name in pairs:
-        data = df_clean[['Blood_Lead', col]].dropna()
-        if len(data) > 100:
-            r, p = stats.spearmanr(data['Blood_Lead'], data[col])
+        if corr.at[col, 'n'] > 100:
+            r, p = corr.at[col, 'r'], corr.at[col, 'p_value']
             sig = "***" if p < 0.001 else "**" if p < 0.01 else "*" if p < 0.05 else "NS"
             print(f"   铅 vs {name}: r={r:.3f}, p={p:.4f} {sig}")
             results.append({
@@ -229,61 +111,39 @@ def main():
                 '显著性': sig
             })
     
-    # 6. 中介效应分析
+    # 4. 中介效应分析
     print(f"\n" + "="*60)
     print("📊 中介效应分析 (铅 → TyG指数 → CKM风险)")
     print("="*60)
     
     # 使用Process-like方法进行中介分析
-    mediation_data = df_clean[['Blood_Lead', 'TyG_Index', 'CKM_Risk_Score']].dropna()
-    X = mediation_data['Blood_Lead'].values
-    M = mediation_data['TyG_Index'].values  # 中介变量
-    Y = mediation_data['CKM_Risk_Score'].values  # 因变量
+    med = mediation_analysis(df_clean, 'TyG_Index')
     
     # 路径a: X → M
-    slope_a, intercept_a, r_a, p_a, se_a = stats.linregress(X, M)
     print(f"\n路径a (铅 → TyG指数):")
-    print(f"   β = {slope_a:.4f}, p = {p_a:.4f}")
+    print(f"   β = {med['a']:.4f}, p = {med['p_a']:.4f}")
     
     # 路径b: M → Y (控制X)
-    from scipy import linalg
-    X_with_const = np.column_stack([np.ones(len(X)), X, M])
-    beta_b, residuals, rank, s = linalg.lstsq(X_with_const, Y)
-    y_pred = X_with_const @ beta_b
-    ss_res = np.sum((Y - y_pred)**2)
-    ss_tot = np.sum((Y - np.mean(Y))**2)
-    r2_b = 1 - ss_res/ss_tot
-    
-    # 计算b的标准误 (近似)
-    n = len(Y)
-    mse = ss_res / (n - 3)
-    cov = mse * np.linalg.inv(X_with_const.T @ X_with_const)
-    se_b = np.sqrt(cov[2,2])
-    t_b = beta_b[2] / se_b
-    p_b = 2 * (1 - stats.t.cdf(abs(t_b), n-3))
-    
     print(f"\n路径b (TyG → CKM, 控制铅):")
-    print(f"   β = {beta_b[2]:.4f}, p = {p_b:.4f}")
+    print(f"   β = {med['b']:.4f}, p = {med['p_b']:.4f}")
     
     # 路径c: X → Y (总效应)
-    slope_c, intercept_c, r_c, p_c, se_c = stats.linregress(X, Y)
     print(f"\n路径c (铅 → CKM, 总效应):")
-    print(f"   β = {slope_c:.4f}, p = {p_c:.4f}")
+    print(f"   β = {med['c']:.4f}, p = {med['p_c']:.4f}")
     
     # 间接效应 (a × b)
-    indirect_effect = slope_a * beta_b[2]
+    indirect_effect = med['indirect']
     print(f"\n间接效应 (a × b): {indirect_effect:.4f}")
     
     # 直接效应 (c')
-    direct_effect = beta_b[1]
-    print(f"直接效应 (c'): {direct_effect:.4f}")
+    print(f"直接效应 (c'): {med['direct']:.4f}")
     
     # 中介效应比例
-    if slope_c != 0:
-        mediation_ratio = indirect_effect / slope_c * 100
+    if med['c'] != 0:
+        mediation_ratio = indirect_effect / med['c'] * 100
         print(f"\n中介效应占比: {mediation_ratio:.1f}%")
     
-    # 7. 保存结果
+    # 5. 保存结果
     print(f"\n" + "="*60)
     print("✅ 分析完成!")
     print("="*60)
@@ -294,7 +154,7 @@ def main():
     
     print(f"   结果保存到: {OUTPUT_DIR}/")
     
-    # 8. 总结
+    # 6. 总结
     print(f"\n" + "="*60)
     print("💡 分析总结")
     print("="*60)
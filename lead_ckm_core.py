@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+铅 (Lead) 与 CKM 综合征研究 - 公共流程
+Shared CKM pipeline for lead_ckm_complete / lead_ckm_final
+
+包含:
+1. build_ckm_frame: 读取 NHANES → 合并 → 计算 MetS / CKM 评分与分期
+2. mediation_analysis: 铅 → 中介变量 → CKM风险 的三路径回归
+"""
+
+import numpy as np
+
+from analyze_nhanes import cached_read_xport
+from statistical_tests import ols_from_qr
+
+DATA_DIR = "nhanes_data"
+
+
+def _compact(sub):
+    """SEQN 索引转为 int32, 其余数值列转为 float32"""
+    return sub.set_axis(sub.index.astype(np.int32)).astype(np.float32)
+
+
+def build_ckm_frame(data_dir=DATA_DIR, verbose=False):
+    """构建合并后的 CKM 分析数据框 (verbose=True 时打印各阶段进度)"""
+    # XPT 经 Parquet 缓存读取 (与 lead_ckm_analysis / lead_ckm_aop 共用), 只读取所需列
+    # 血重金属
+    pbbcd = cached_read_xport(f"{data_dir}/PBCD_L.xpt", ['SEQN', 'LBXBPB', 'LBXBCD', 'LBXTHG', 'LBXBSE', 'LBXBMN'])
+
+    # 人口统计
+    demo = cached_read_xport(f"{data_dir}/DEMO_L.xpt", ['SEQN', 'RIDAGEYR', 'RIAGENDR'])
+
+    # 体检数据 (血压+身体测量)
+    bpxo = cached_read_xport(f"{data_dir}/BPXO_L.xpt", ['SEQN', 'BPXOSY1', 'BPXODI1'])  # 血压
+    bmx = cached_read_xport(f"{data_dir}/BMX_L.xpt", ['SEQN', 'BMXBMI', 'BMXWAIST'])    # 身体测量
+
+    # 生化指标
+    hdl = cached_read_xport(f"{data_dir}/HDL_L.xpt", ['SEQN', 'LBDHDD'])
+    trigly = cached_read_xport(f"{data_dir}/TRIGLY_L.xpt", ['SEQN', 'LBXTLG'])
+    ghb = cached_read_xport(f"{data_dir}/GHB_L.xpt", ['SEQN', 'LBXGH'])
+
+    # 问卷
+    mcq = cached_read_xport(f"{data_dir}/MCQ_L.xpt", ['SEQN', 'MCQ010', 'MCQ160A', 'MCQ160B', 'MCQ160C', 'MCQ160D'])
+
+    if verbose:
+        print("   数据加载完成!")
+        print("\n📊 合并数据...")
+
+    # 各表以 SEQN 为索引，一次多表左连接 (以血重金属表为基准)
+    metals = (pbbcd.set_index('SEQN')[['LBXBPB', 'LBXBCD', 'LBXTHG', 'LBXBSE', 'LBXBMN']]
+              .rename(columns={'LBXBPB': 'Blood_Lead', 'LBXBCD': 'Blood_Cd', 'LBXTHG': 'Blood_Hg',
+                               'LBXBSE': 'Blood_Se', 'LBXBMN': 'Blood_Mn'}))
+
+    # 人口统计
+    demo_sub = (demo.set_index('SEQN')[['RIDAGEYR', 'RIAGENDR']]
+                .rename(columns={'RIDAGEYR': 'Age', 'RIAGENDR': 'Gender'}))
+
+    # 血压 (收缩压/舒张压)
+    bpxo_sub = (bpxo.set_index('SEQN')[['BPXOSY1', 'BPXODI1']]
+                .rename(columns={'BPXOSY1': 'SBP', 'BPXODI1': 'DBP'}))
+
+    # 身体测量 (BMI, 腰围)
+    bmx_sub = (bmx.set_index('SEQN')[['BMXBMI', 'BMXWAIST']]
+               .rename(columns={'BMXBMI': 'BMI', 'BMXWAIST': 'Waist_Circumference'}))
+
+    # 血脂
+    hdl_sub = hdl.set_index('SEQN')[['LBDHDD']].rename(columns={'LBDHDD': 'HDL'})
+    trigly_sub = trigly.set_index('SEQN')[['LBXTLG']].rename(columns={'LBXTLG': 'Triglycerides'})
+
+    # 血糖
+    ghb_sub = ghb.set_index('SEQN')[['LBXGH']].rename(columns={'LBXGH': 'HbA1c'})
+
+    # 问卷 (疾病史)
+    mcq_sub = (mcq.set_index('SEQN')[['MCQ010', 'MCQ160A', 'MCQ160B', 'MCQ160C', 'MCQ160D']]
+               .rename(columns={'MCQ010': 'Diabetes_Doctor', 'MCQ160A': 'Hypertension_Dx',
+                                'MCQ160B': 'Heart_Disease', 'MCQ160C': 'Kidney_Disease',
+                                'MCQ160D': 'Stroke'}))
+
+    # 连接前统一压缩存储: SEQN 为 int32, 数值列为 float32 (含缺失值)
+    metals = _compact(metals)
+    subs = [_compact(sub) for sub in [demo_sub, bpxo_sub, bmx_sub, hdl_sub, trigly_sub, ghb_sub, mcq_sub]]
+    # 一对一连接: 任一表 SEQN 重复即报错 (替代 merge 的 validate='one_to_one')
+    names = ['PBCD_L', 'DEMO_L', 'BPXO_L', 'BMX_L', 'HDL_L', 'TRIGLY_L', 'GHB_L', 'MCQ_L']
+    for name, sub in zip(names, [metals] + subs):
+        if not sub.index.is_unique:
+            raise ValueError(f"{name} 中 SEQN 不唯一")
+    df = metals.join(subs, how='left').reset_index()
+    if verbose:
+        print(f"   合并后样本量: {len(df)}")
+        print("\n📊 计算CKM综合征相关指标...")
+
+    # TyG指数 (甘油三酯-葡萄糖指数) - 胰岛素抵抗指标
+    # TyG = ln(甘油三酯 × 葡萄糖 / 2); 派生连续指标用压缩前的 float64 原值计算
+    tyg = np.log(trigly_sub['Triglycerides'] * ghb_sub['HbA1c'] / 2)
+    tyg.index = tyg.index.astype(np.int32)
+
+    # 代谢综合征指标 (根据NCEP-ATP III标准)
+    # 按性别取阈值 (女性 Gender==2), 与对应列一次比较
+    is_female = df['Gender'].to_numpy() == 2
+
+    # 腰围增大 (亚洲人标准: 男>90cm, 女>80cm)
+    waist_thr = np.where(is_female, 80.0, 90.0)
+    df['High_Waist'] = (df['Waist_Circumference'].to_numpy() > waist_thr).astype(np.int8)
+
+    # 甘油三酯 ≥ 150 mg/dL
+    df['High_TG'] = (df['Triglycerides'] >= 150).astype(np.int8)
+
+    # HDL < 40 mg/dL (男) 或 <50 mg/dL (女)
+    hdl_thr = np.where(is_female, 50.0, 40.0)
+    df['Low_HDL'] = (df['HDL'].to_numpy() < hdl_thr).astype(np.int8)
+
+    # 血压 ≥ 130/85 mmHg
+    df['High_BP'] = ((df['SBP'] >= 130) | (df['DBP'] >= 85)).astype(np.int8)
+
+    # 空腹血糖 ≥ 100 mg/dL (使用HbA1c ≥ 5.7% 作为糖尿病前期)
+    df['High_Glucose'] = (df['HbA1c'] >= 5.7).astype(np.int8)
+
+    # 代谢综合征评分 (0-5); 缺失值的比较结果为 False, 各指标已是 0/1, 无需 fillna
+    mets_cols = ['High_Waist', 'High_TG', 'Low_HDL', 'High_BP', 'High_Glucose']
+    df['MetS_Score'] = df[mets_cols].to_numpy().sum(axis=1, dtype=np.int8)
+
+    # TyG指数 (float64)
+    df['TyG_Index'] = tyg.reindex(df['SEQN'].to_numpy()).to_numpy()
+
+    # 心血管-肾脏疾病史
+    # 问卷编码 1=是; 2=否, 7=拒答, 9=不知道, 缺失 均记为 0
+    df[['Hypertension', 'Diabetes', 'Heart_Disease', 'Kidney_Disease']] = (
+        df[['Hypertension_Dx', 'Diabetes_Doctor', 'Heart_Disease', 'Kidney_Disease']].to_numpy() == 1
+    ).astype(np.int8)
+
+    # CKM综合风险评分 (0-10)
+    df['CKM_Risk_Score'] = df[['Hypertension', 'Diabetes', 'Heart_Disease', 'Kidney_Disease',
+                               'MetS_Score']].to_numpy().sum(axis=1, dtype=np.int8)
+
+    # CKM分期 (基于AHA标准)
+    # 0期: 无CKM风险因素
+    # 1期: 代谢危险因素积累 (肥胖、糖尿病前期)
+    # 2期: 代谢性疾病 (糖尿病、高血压、血脂异常)
+    # 3期: 亚临床CVD/CKD
+    # 4期: 临床CVD/CKD
+    # 代谢分: MetS≥3 或糖尿病 2 分, MetS≥1 1 分; 心/肾疾病另加 2 分; 上限 4
+    mets = df['MetS_Score'].to_numpy()
+    diabetes = df['Diabetes'].to_numpy() == 1
+    cvd_ckd = (df['Heart_Disease'].to_numpy() == 1) | (df['Kidney_Disease'].to_numpy() == 1)
+    metabolic = np.where((mets >= 3) | diabetes, 2, (mets >= 1).astype(np.int64))
+    df['CKM_Stage'] = np.minimum(metabolic + 2 * cvd_ckd, 4).astype(np.int8)
+
+    return df
+
+
+def mediation_analysis(df, mediator_col, exposure_col='Blood_Lead', outcome_col='CKM_Risk_Score'):
+    """暴露 → 中介 → 结局 的 Baron-Kenny 三路径回归, 返回各路径系数与 p 值"""
+    data = df[[exposure_col, mediator_col, outcome_col]].dropna()
+    X, M, Y = data.to_numpy(dtype=float).T  # M: 中介变量, Y: 因变量
+
+    # 三条路径共用设计矩阵 [1, X, M] 的一次 QR 分解; 路径a/c 为其前两列的子模型 (R 的左上 2×2 块)
+    n = len(Y)
+    Q, R = np.linalg.qr(np.column_stack([np.ones(n), X, M]))
+    qty = Q.T @ Y
+
+    # 路径a: X → M
+    beta_a, _, p_a = ols_from_qr(R[:2, :2], Q[:, :2].T @ M, M @ M, n)
+    # 路径b: M → Y (控制X); 其X系数即直接效应 c'
+    beta_b, _, p_b = ols_from_qr(R, qty, Y @ Y, n)
+    # 路径c: X → Y (总效应)
+    beta_c, _, p_c = ols_from_qr(R[:2, :2], qty[:2], Y @ Y, n)
+
+    return {
+        'n': n,
+        'a': beta_a[1], 'p_a': p_a[1],
+        'b': beta_b[2], 'p_b': p_b[2],
+        'c': beta_c[1], 'p_c': p_c[1],
+        'indirect': beta_a[1] * beta_b[2],
+        'direct': beta_b[1],
+    }
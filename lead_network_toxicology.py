@@ -11,15 +11,21 @@ Network Toxicology Analysis for Lead (Pb)
 """
 
 import requests
+import numpy as np
 import pandas as pd
-import json
 import os
-from collections import defaultdict
+from collections import Counter, defaultdict
+
+from http_cache import cache_file, load_cached, save_cached
+from json_utils import dump_json
 
 # 配置
 OUTPUT_DIR = "output"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# CTD/STRING 响应的本地缓存有效期 (http_cache, 与 lead_bp_targets 共用目录)
+HTTP_CACHE_TTL = 24 * 3600
+
 # CTD API - 获取铅的靶点基因
 def get_ctd_targets(chemical="Lead"):
     """从CTD数据库获取化学物质的靶点基因"""
@@ -36,10 +42,17 @@ def get_ctd_targets(chemical="Lead"):
         "format": "json"
     }
     
+    cache_path = cache_file(url, params)
+    data = load_cached(cache_path, HTTP_CACHE_TTL)
+    if data is not None:
+        print(f"✅ CTD返回 {len(data.get('annotations', []))} 条记录 (缓存)")
+        return data
+    
     try:
         response = requests.get(url, params=params, timeout=30)
         if response.status_code == 200:
             data = response.json()
+            save_cached(cache_path, data)
             print(f"✅ CTD返回 {len(data.get('annotations', []))} 条记录")
             return data
     except Exception as e:
@@ -117,10 +130,17 @@ def get_string_network(genes, species=9606):
         "network_type": "functional"
     }
     
+    cache_path = cache_file(url, data)
+    result = load_cached(cache_path, HTTP_CACHE_TTL)
+    if result is not None:
+        print(f"✅ STRING返回 {len(result)} 条互作关系 (缓存)")
+        return result
+    
     try:
         response = requests.post(url, json=data, timeout=60)
         if response.status_code == 200:
             result = response.json()
+            save_cached(cache_path, result)
             print(f"✅ STRING返回 {len(result)} 条互作关系")
             return result
     except Exception as e:
@@ -132,7 +152,8 @@ def get_string_interactions(genes):
     """获取STRING互作数据"""
     import urllib.parse
     
-    gene_list = list(set(genes))[:300]
+    # 排序后截取, 保证同一基因集合的请求参数 (及缓存键) 每次相同
+    gene_list = sorted(set(genes))[:300]
     
     url = "https://string-db.org/api/tsv/interactions"
     params = {
@@ -140,10 +161,17 @@ def get_string_interactions(genes):
         "genes": gene_list
     }
     
+    cache_path = cache_file(url, params)
+    lines = load_cached(cache_path, HTTP_CACHE_TTL)
+    if lines is not None:
+        print(f"✅ 获取 {len(lines)-1} 条STRING互作 (缓存)")
+        return lines
+    
     try:
         response = requests.get(url, params=params, timeout=60)
         if response.status_code == 200:
             lines = response.text.strip().split('\n')
+            save_cached(cache_path, lines)
             print(f"✅ 获取 {len(lines)-1} 条STRING互作")
             return lines
     except Exception as e:
@@ -165,66 +193,84 @@ def kegg_enrichment(genes):
     # 备用: 手动实现富集
     return manual_kegg_enrichment(genes)
 
+# 铅毒性已知通路
+LEAD_PATHWAYS = {
+    "Oxidative Stress Pathway": {
+        "genes": ["SOD1", "SOD2", "CAT", "GPX1", "GPX4", "NQO1", "HMOX1", "MT1A", "MT2A"],
+        "pvalue": 1e-15,
+        "description": "氧化应激反应"
+    },
+    "Inflammatory Response": {
+        "genes": ["IL1B", "IL6", "TNF", "NFKB1", "PTGS2", "COX2"],
+        "pvalue": 1e-12,
+        "description": "炎症反应"
+    },
+    "Neurotoxicity Pathway": {
+        "genes": ["APP", "MAPT", "BDNF", "MAPK1", "MAPK3", "CASP3", "TP53"],
+        "pvalue": 1e-10,
+        "description": "神经毒性通路"
+    },
+    "Nephrotoxicity Pathway": {
+        "genes": ["HAVCR1", "LCN2", "NGAL", "Kim-1", "NFKB1", "CASP3"],
+        "pvalue": 1e-8,
+        "description": "肾毒性通路"
+    },
+    "Heme Biosynthesis": {
+        "genes": ["ALAS2", "ALAD", "FECH", "GATA1"],
+        "pvalue": 1e-14,
+        "description": "血红素合成通路"
+    },
+    "DNA Damage Repair": {
+        "genes": ["XRCC1", "XRCC3", "OGG1", "GSTA1", "GSTM1", "GSTP1"],
+        "pvalue": 1e-9,
+        "description": "DNA损伤修复"
+    },
+    "Apoptosis Pathway": {
+        "genes": ["TP53", "BCL2", "BAX", "CASP3", "CASP9", "AKT1"],
+        "pvalue": 1e-11,
+        "description": "细胞凋亡通路"
+    },
+    "MAPK Signaling": {
+        "genes": ["MAPK1", "MAPK3", "MAPK8", "MAPK14", "EGFR", "RAS"],
+        "pvalue": 1e-8,
+        "description": "MAPK信号通路"
+    },
+    "Metal Transport": {
+        "genes": ["MT1A", "MT2A", "SLC11A2", "SLC39A8", "SLC30A1"],
+        "pvalue": 1e-13,
+        "description": "金属转运"
+    },
+    "Cardiovascular Disease": {
+        "genes": ["ACE", "AGT", "NOS3", "NOS2", "AGTR1", "NFKB1"],
+        "pvalue": 1e-7,
+        "description": "心血管疾病相关"
+    }
+}
+
+# 通路基因在导入时转为 frozenset, 之后不再重建集合
+for _info in LEAD_PATHWAYS.values():
+    _info["genes"] = frozenset(_info["genes"])
+
+# 通路 × 基因 成员矩阵 (模块加载时构建一次)
+_PATHWAY_NAMES = list(LEAD_PATHWAYS)
+_PATHWAY_GENES = sorted(frozenset().union(*(info["genes"] for info in LEAD_PATHWAYS.values())))
+_GENE_IDX = {g: i for i, g in enumerate(_PATHWAY_GENES)}
+_PATHWAY_MATRIX = np.zeros((len(_PATHWAY_NAMES), len(_PATHWAY_GENES)), dtype=np.int8)
+for _p, _name in enumerate(_PATHWAY_NAMES):
+    _PATHWAY_MATRIX[_p, [_GENE_IDX[g] for g in LEAD_PATHWAYS[_name]["genes"]]] = 1
+
+
 def manual_kegg_enrichment(genes):
     """手动铅相关通路分析"""
-    
-    # 铅毒性已知通路
-    lead_pathways = {
-        "Oxidative Stress Pathway": {
-            "genes": ["SOD1", "SOD2", "CAT", "GPX1", "GPX4", "NQO1", "HMOX1", "MT1A", "MT2A"],
-            "pvalue": 1e-15,
-            "description": "氧化应激反应"
-        },
-        "Inflammatory Response": {
-            "genes": ["IL1B", "IL6", "TNF", "NFKB1", "PTGS2", "COX2"],
-            "pvalue": 1e-12,
-            "description": "炎症反应"
-        },
-        "Neurotoxicity Pathway": {
-            "genes": ["APP", "MAPT", "BDNF", "MAPK1", "MAPK3", "CASP3", "TP53"],
-            "pvalue": 1e-10,
-            "description": "神经毒性通路"
-        },
-        "Nephrotoxicity Pathway": {
-            "genes": ["HAVCR1", "LCN2", "NGAL", "Kim-1", "NFKB1", "CASP3"],
-            "pvalue": 1e-8,
-            "description": "肾毒性通路"
-        },
-        "Heme Biosynthesis": {
-            "genes": ["ALAS2", "ALAD", "FECH", "GATA1"],
-            "pvalue": 1e-14,
-            "description": "血红素合成通路"
-        },
-        "DNA Damage Repair": {
-            "genes": ["XRCC1", "XRCC3", "OGG1", "GSTA1", "GSTM1", "GSTP1"],
-            "pvalue": 1e-9,
-            "description": "DNA损伤修复"
-        },
-        "Apoptosis Pathway": {
-            "genes": ["TP53", "BCL2", "BAX", "CASP3", "CASP9", "AKT1"],
-            "pvalue": 1e-11,
-            "description": "细胞凋亡通路"
-        },
-        "MAPK Signaling": {
-            "genes": ["MAPK1", "MAPK3", "MAPK8", "MAPK14", "EGFR", "RAS"],
-            "pvalue": 1e-8,
-            "description": "MAPK信号通路"
-        },
-        "Metal Transport": {
-            "genes": ["MT1A", "MT2A", "SLC11A2", "SLC39A8", "SLC30A1"],
-            "pvalue": 1e-13,
-            "description": "金属转运"
-        },
-        "Cardiovascular Disease": {
-            "genes": ["ACE", "AGT", "NOS3", "NOS2", "AGTR1", "NFKB1"],
-            "pvalue": 1e-7,
-            "description": "心血管疾病相关"
-        }
-    }
-    
+    # 查询基因只转一次集合; 指示向量与成员矩阵一次矩阵-向量乘得到所有通路的重叠数
+    gene_set = frozenset(genes)
+    query = np.zeros(len(_PATHWAY_GENES), dtype=np.int8)
+    query[[_GENE_IDX[g] for g in gene_set.intersection(_GENE_IDX)]] = 1
+    overlaps = _PATHWAY_MATRIX @ query
+
     enriched = []
-    for pathway, info in lead_pathways.items():
-        overlap = len(set(genes) & set(info["genes"]))
+    for pathway, overlap in zip(_PATHWAY_NAMES, overlaps.tolist()):
+        info = LEAD_PATHWAYS[pathway]
         if overlap >= 3:
             enriched.append({
                 "pathway": pathway,
@@ -237,31 +283,33 @@ def manual_kegg_enrichment(genes):
     return sorted(enriched, key=lambda x: x["pvalue"])
 
 # 生成网络可视化
-def generate_network_html(genes, interactions, pathways):
-    """生成交互式网络HTML"""
+def generate_network_html(genes, interactions, pathways, path):
+    """生成交互式网络HTML, 分段写入 path"""
+    
+    # 根据通路分类着色: 遍历通路一次, 基因取其所在的第一条通路的颜色
+    gene2color = {}
+    for pathway in pathways:
+        color = "#4a90d9"  # 默认蓝色
+        if "Oxidative" in pathway["pathway"]:
+            color = "#e74c3c"  # 红色
+        elif "Neuro" in pathway["pathway"]:
+            color = "#9b59b6"  # 紫色
+        elif "Nephro" in pathway["pathway"]:
+            color = "#e67e22"  # 橙色
+        elif "Inflammatory" in pathway["pathway"]:
+            color = "#f39c12"  # 黄色
+        for gene in pathway.get("genes", []):
+            gene2color.setdefault(gene, color)
     
     # 构建节点
+    gene_counts = Counter(genes)
     nodes = []
     for gene in genes[:100]:
-        # 根据通路分类着色
-        color = "#4a90d9"  # 默认蓝色
-        for pathway in pathways:
-            if gene in pathway.get("genes", []):
-                if "Oxidative" in pathway["pathway"]:
-                    color = "#e74c3c"  # 红色
-                elif "Neuro" in pathway["pathway"]:
-                    color = "#9b59b6"  # 紫色
-                elif "Nephro" in pathway["pathway"]:
-                    color = "#e67e22"  # 橙色
-                elif "Inflammatory" in pathway["pathway"]:
-                    color = "#f39c12"  # 黄色
-                break
-        
         nodes.append({
             "id": gene,
             "label": gene,
-            "color": color,
-            "size": 20 + min(30, len([g for g in genes if g == gene]) * 10)
+            "color": gene2color.get(gene, "#4a90d9"),
+            "size": 20 + min(30, gene_counts[gene] * 10)
         })
     
     # 构建边
@@ -274,7 +322,14 @@ def generate_network_html(genes, interactions, pathways):
                 "width": min(5, inter.get("score", 0) / 200)
             })
     
-    html = f"""<!DOCTYPE html>
+    with open(path, "w", encoding="utf-8") as f:
+        _write_network_html(f, genes, interactions, pathways, nodes, edges)
+    
+    return path
+
+def _write_network_html(f, genes, interactions, pathways, nodes, edges):
+    """按顺序写出 HTML 头部、通路列表、节点/边数据与脚本尾部"""
+    f.write(f"""<!DOCTYPE html>
 <html>
 <head>
     <title>Lead (Pb) Network Toxicology - {len(genes)} Genes</title>
@@ -326,24 +381,30 @@ def generate_network_html(genes, interactions, pathways):
         
         <div class="pathways">
             <h2>📊 KEGG通路富集结果</h2>
-"""
+""")
     
     for pw in pathways[:8]:
-        html += f"""
+        f.write(f"""
             <div class="pathway-item">
                 <strong>{pw['pathway']}</strong> - {pw['description']}<br>
                 <small>重叠基因: {pw['overlap']}/{pw['total']} | p-value: {pw['pvalue']:.2e}</small>
             </div>
-"""
+""")
     
-    html += """
+    f.write("""
         <h2>📋 靶点基因列表 (Top 50)</h2>
-        <p>""" + ", ".join(genes[:50]) + """</p>
+        <p>""")
+    f.write(", ".join(genes[:50]))
+    f.write("""</p>
     </div>
     
     <script type="text/javascript">
-        var nodes = new vis.DataSet(""" + json.dumps(nodes) + """);
-        var edges = new vis.DataSet(""" + json.dumps(edges) + """);
+        var nodes = new vis.DataSet(""")
+    dump_json(nodes, f)
+    f.write(""");
+        var edges = new vis.DataSet(""")
+    dump_json(edges, f)
+    f.write(""");
         
         var container = document.getElementById('network');
         var data = { nodes: nodes, edges: edges };
@@ -357,9 +418,7 @@ def generate_network_html(genes, interactions, pathways):
         var network = new vis.Network(container, data, options);
     </script>
 </body>
-</html>"""
-    
-    return html
+</html>""")
 
 # 主函数
 def main():
@@ -398,9 +457,8 @@ def main():
         f.write("\\n".join(interactions))
     
     # 生成可视化
-    html = generate_network_html(genes, interactions if isinstance(interactions, list) else [], pathways)
-    with open(f"{OUTPUT_DIR}/lead_network_toxicology.html", "w", encoding="utf-8") as f:
-        f.write(html)
+    generate_network_html(genes, interactions if isinstance(interactions, list) else [], pathways,
+                          f"{OUTPUT_DIR}/lead_network_toxicology.html")
     
     print(f"\n✅ 分析完成! 结果保存到 {OUTPUT_DIR}/")
     print(f"   - lead_target_genes.txt")
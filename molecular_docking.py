@@ -5,6 +5,9 @@ Molecular Docking Analysis for Lead-binding Targets
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 import requests
 
 OUTPUT_DIR = "output"
@@ -42,25 +45,36 @@ PDB: 1M11
 - 降低NO合成
 """)
 
+def _download_pdb(session, name, pdb_id):
+    """下载单个PDB文件，返回状态信息"""
+    url = f"https://files.rcsb.org/download/{pdb_id}.pdb"
+    path = f"{OUTPUT_DIR}/{name}_{pdb_id}.pdb"
+    if os.path.exists(path):
+        return f"已存在: {path}"
+    try:
+        r = session.get(url, timeout=30)
+        if r.status_code == 200:
+            with open(path, 'w') as f:
+                f.write(r.text)
+            return f"下载成功: {path}"
+    except Exception as e:
+        return f"下载失败: {e}"
+    return None
+
 def get_pdb():
     print("\n" + "="*60)
     print("下载PDB蛋白结构")
     print("="*60)
     
     structures = {"ACE": "1UZ6", "NOS3": "1M11"}
-    for name, pdb_id in structures.items():
-        url = f"https://files.rcsb.org/download/{pdb_id}.pdb"
-        path = f"{OUTPUT_DIR}/{name}_{pdb_id}.pdb"
-        if os.path.exists(path):
-            print(f"已存在: {path}")
-        else:
-            try:
-                r = requests.get(url, timeout=30)
-                if r.status_code == 200:
-                    open(path, 'w').write(r.text)
-                    print(f"下载成功: {path}")
-            except Exception as e:
-                print(f"下载失败: {e}")
+    
+    # 各结构并发下载，共享 Session 复用连接；按原顺序输出状态
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=8) as pool:
+        messages = list(pool.map(partial(_download_pdb, session),
+                                 structures.keys(), structures.values()))
+    for message in messages:
+        if message:
+            print(message)
 
 def main():
     print("分子对接分析 - 铅与关键靶点")
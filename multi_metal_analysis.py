@@ -18,16 +18,19 @@ Multi-Metal Network Toxicology Comparative Analysis
 """
 
 import os
-import json
+import csv
 import requests
 import pandas as pd
 import numpy as np
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from matplotlib import rcParams
-import seaborn as sns
+
+from json_utils import dump_json
 
 # 设置中文字体
 rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans']
@@ -144,6 +147,10 @@ METAL_GENES = {
     ]
 }
 
+# 导入时去重一次: 集合供交并运算, 列表保留原顺序 (用于取前几个基因)
+METAL_GENE_SETS = {m: frozenset(g) for m, g in METAL_GENES.items()}
+METAL_GENE_LISTS = {m: list(dict.fromkeys(g)) for m, g in METAL_GENES.items()}
+
 # 疾病关联 (金属 -> 疾病)
 METAL_DISEASES = {
     'Lead': [
@@ -222,41 +229,50 @@ METAL_PATHWAYS = {
     ]
 }
 
+# 全部通路 / 疾病名称 (去重, 按首次出现的顺序)
+ALL_PATHWAYS = tuple(dict.fromkeys(pw[0] for pws in METAL_PATHWAYS.values() for pw in pws))
+ALL_DISEASES = tuple(dict.fromkeys(d[0] for ds in METAL_DISEASES.values() for d in ds))
+
 
 # ============================================================================
 # 核心函数
 # ============================================================================
 
 def get_metal_genes(metal):
-    """获取特定金属的靶点基因"""
-    return METAL_GENES.get(metal, [])
+    """获取特定金属的靶点基因 (已去重, 保持原顺序)"""
+    return METAL_GENE_LISTS.get(metal, [])
 
 
 def get_all_genes():
     """获取所有金属的基因并集"""
-    all_genes = set()
-    for genes in METAL_GENES.values():
-        all_genes.update(genes)
-    return list(all_genes)
+    return list(frozenset().union(*METAL_GENE_SETS.values()))
+
+
+def _build_indicator():
+    """构建 基因 × 金属 的 0/1 指示矩阵 A"""
+    gene_universe = sorted(get_all_genes())
+    gene_to_idx = {g: i for i, g in enumerate(gene_universe)}
+    A = np.zeros((len(gene_universe), len(METAL_GENE_SETS)), dtype=np.uint8)
+    for m_idx, genes in enumerate(METAL_GENE_SETS.values()):
+        A[[gene_to_idx[g] for g in genes], m_idx] = 1
+    return A, np.array(gene_universe)
+
+
+# 模块加载时构建一次, 供相似性与共享基因计算复用
+INDICATOR, GENE_UNIVERSE = _build_indicator()
 
 
 def calculate_metal_similarity():
     """计算金属间的基因重叠相似性"""
     metals = list(METAL_GENES.keys())
-    n = len(metals)
-    similarity_matrix = np.zeros((n, n))
+    A = INDICATOR.astype(np.int32)
     
-    for i, m1 in enumerate(metals):
-        for j, m2 in enumerate(metals):
-            genes1 = set(METAL_GENES[m1])
-            genes2 = set(METAL_GENES[m2])
-            
-            if len(genes1) > 0 and len(genes2) > 0:
-                # Jaccard similarity
-                intersection = len(genes1 & genes2)
-                union = len(genes1 | genes2)
-                similarity = intersection / union if union > 0 else 0
-                similarity_matrix[i, j] = similarity
+    # Jaccard similarity: 交集 B = AᵀA, 并集 |Xi| + |Xj| - B
+    intersection = A.T @ A
+    sizes = A.sum(axis=0)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    with np.errstate(invalid='ignore', divide='ignore'):
+        similarity_matrix = np.where(union > 0, intersection / union, 0.0)
     
     return pd.DataFrame(similarity_matrix, index=metals, columns=metals)
 
@@ -264,23 +280,19 @@ def calculate_metal_similarity():
 def find_shared_genes():
     """找出金属间共享的基因"""
     metals = list(METAL_GENES.keys())
+    A = INDICATOR.astype(bool)
     shared = {}
     
-    # 两两共享
-    for i, m1 in enumerate(metals):
-        for j, m2 in enumerate(metals):
-            if i < j:
-                genes1 = set(METAL_GENES[m1])
-                genes2 = set(METAL_GENES[m2])
-                shared_genes = genes1 & genes2
-                if shared_genes:
-                    shared[f"{m1}-{m2}"] = list(shared_genes)
+    # 两两共享: 两列指示向量按位与
+    for i, j in combinations(range(len(metals)), 2):
+        mask = A[:, i] & A[:, j]
+        if mask.any():
+            shared[f"{metals[i]}-{metals[j]}"] = GENE_UNIVERSE[mask].tolist()
     
     # 全部共享
-    all_sets = [set(genes) for genes in METAL_GENES.values()]
-    common_genes = set.intersection(*all_sets)
-    if common_genes:
-        shared['All-Metals'] = list(common_genes)
+    common_mask = A.all(axis=1)
+    if common_mask.any():
+        shared['All-Metals'] = GENE_UNIVERSE[common_mask].tolist()
     
     return shared
 
@@ -301,7 +313,7 @@ def build_comparative_table():
             'Symbol': METALS[metal]['symbol'],
             'Name': METALS[metal]['name'],
             'Gene_Count': len(genes),
-            'Unique_Genes': len(set(genes)),
+            'Unique_Genes': len(METAL_GENE_SETS[metal]),
             'Top_Pathway': pathways[0][0] if pathways else 'N/A',
             'Top_Disease': diseases[0][0] if diseases else 'N/A',
             'Color': METALS[metal]['color']
@@ -312,23 +324,35 @@ def build_comparative_table():
 
 def generate_similarity_heatmap(similarity_df, output_dir):
     """生成金属相似性热图"""
-    fig, ax = plt.subplots(figsize=(10, 8), dpi=300)
+    fig, ax = plt.subplots(figsize=(10, 8))
     fig.patch.set_facecolor('white')
     
     # 创建带标签的矩阵
     labels = [METALS[m]['symbol'] for m in similarity_df.index]
     
-    # 热图
-    sns.heatmap(similarity_df.values, 
-                annot=True, 
-                fmt='.2f',
-                cmap='RdYlBu_r',
-                xticklabels=labels,
-                yticklabels=labels,
-                ax=ax,
-                vmin=0, vmax=1,
-                square=True,
-                cbar_kws={'label': 'Jaccard Similarity'})
+    # 热图 (5×5 矩阵, 直接用 imshow 绘制)
+    values = similarity_df.to_numpy()
+    cmap = plt.get_cmap('RdYlBu_r')
+    im = ax.imshow(values, cmap=cmap, vmin=0, vmax=1)
+    ax.set_xticks(range(len(labels)))
+    ax.set_xticklabels(labels)
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels(labels)
+    ax.tick_params(length=0)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    
+    # 数值标注: 深色格子用白字, 浅色格子用黑字
+    for i in range(values.shape[0]):
+        for j in range(values.shape[1]):
+            # 相对亮度 (sRGB 先线性化), 深色格子用白字
+            rgb = np.asarray(cmap(values[i, j])[:3])
+            rgb = np.where(rgb <= 0.03928, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+            luminance = rgb @ [0.2126, 0.7152, 0.0722]
+            ax.text(j, i, f'{values[i, j]:.2f}', ha='center', va='center',
+                    color='black' if luminance > 0.408 else 'white')
+    
+    plt.colorbar(im, ax=ax, label='Jaccard Similarity')
     
     ax.set_title('Metal Toxicity Gene Overlap\n(Jaccard Similarity)', 
                 fontsize=14, fontweight='bold', pad=20)
@@ -346,7 +370,7 @@ def generate_similarity_heatmap(similarity_df, output_dir):
 
 def generate_pathway_comparison(output_dir):
     """生成通路对比图"""
-    fig, axes = plt.subplots(2, 3, figsize=(15, 10), dpi=300)
+    fig, axes = plt.subplots(2, 3, figsize=(15, 10))
     fig.patch.set_facecolor('white')
     axes = axes.flatten()
     
@@ -417,12 +441,7 @@ def generate_disease_association_network(shared_genes, output_dir):
         node_id += 1
     
     # 添加通路节点
-    all_pathways = set()
-    for pathways in METAL_PATHWAYS.values():
-        for pw in pathways:
-            all_pathways.add(pw[0])
-    
-    for pw in list(all_pathways)[:10]:
+    for pw in ALL_PATHWAYS[:10]:
         nodes.append({
             'id': node_id,
             'label': pw,
@@ -433,12 +452,7 @@ def generate_disease_association_network(shared_genes, output_dir):
         node_id += 1
     
     # 添加疾病节点
-    all_diseases = set()
-    for diseases in METAL_DISEASES.values():
-        for d in diseases:
-            all_diseases.add(d[0])
-    
-    for disease in list(all_diseases)[:10]:
+    for disease in ALL_DISEASES[:10]:
         nodes.append({
             'id': node_id,
             'label': disease,
@@ -448,24 +462,31 @@ def generate_disease_association_network(shared_genes, output_dir):
         })
         node_id += 1
     
+    # (类型, 标签) -> 节点 id, 边的端点按字典查找; 按类型区分, 避免与同名的通路/疾病节点混淆
+    node_ids = {(node['type'], node['label']): node['id'] for node in nodes}
+    
     # 构建边
-    edges = []
-    
-    # 金属 -> 基因 边
-    for i, (metal, genes) in enumerate(METAL_GENES.items()):
-        metal_node = i
-        for gene in genes[:5]:  # 限制数量
-            for j, node in enumerate(nodes):
-                if node['label'] == gene:
-                    edges.append({
-                        'from': metal_node,
-                        'to': j,
-                        'color': '#ccc',
-                        'width': 1
-                    })
-    
-    # 生成HTML
-    html = f"""<!DOCTYPE html>
+    # 金属 -> 基因 边: 每种金属取前 5 个基因 (限制数量), 端点 id 一次取出, 不在网络中的基因记为 -1
+    top_genes = [genes[:5] for genes in METAL_GENE_LISTS.values()]
+    metal_ids = np.repeat(np.arange(len(top_genes)), [len(genes) for genes in top_genes])
+    gene_ids = np.array([node_ids.get(('gene', gene), -1) for genes in top_genes for gene in genes],
+                        dtype=np.int32)
+    keep = gene_ids >= 0
+    edges = [{'from': int(m), 'to': int(t), 'color': '#ccc', 'width': 1}
+             for m, t in zip(metal_ids[keep], gene_ids[keep])]
+    
+    # 生成HTML: 按片段直接写入文件, 不拼接整页字符串
+    filename = os.path.join(output_dir, 'multi_metal_network.html')
+    with open(filename, 'w', encoding='utf-8') as f:
+        _write_network_html(f, nodes, edges, shared_genes)
+    print(f"Saved: {filename}")
+    
+    return filename
+
+
+def _write_network_html(f, nodes, edges, shared_genes):
+    """依次写出页面头部、对比表各行、共享基因与网络脚本"""
+    f.write(f"""<!DOCTYPE html>
 <html>
 <head>
     <title>Multi-Metal Network Toxicology</title>
@@ -532,7 +553,7 @@ def generate_disease_association_network(shared_genes, output_dir):
                     <th>主要通路</th>
                     <th>主要疾病</th>
                 </tr>
-"""
+""")
     
     # 添加表格行
     for metal, info in METALS.items():
@@ -543,7 +564,7 @@ def generate_disease_association_network(shared_genes, output_dir):
         top_pathway = pathways[0][0] if pathways else 'N/A'
         top_disease = diseases[0][0] if diseases else 'N/A'
         
-        html += f"""
+        f.write(f"""
                 <tr>
                     <td>
                         <div class="metal-cell">
@@ -555,21 +576,27 @@ def generate_disease_association_network(shared_genes, output_dir):
                     <td>{top_pathway}</td>
                     <td>{top_disease}</td>
                 </tr>
-"""
+""")
     
-    html += """
+    f.write("""
             </table>
         </div>
         
         <div class="table-container">
             <h2>🧬 跨金属共享基因</h2>
-            <p>""" + ", ".join(shared_genes.get('All-Metals', [])) + """</p>
+            <p>""")
+    f.write(", ".join(shared_genes.get('All-Metals', [])))
+    f.write("""</p>
         </div>
     </div>
     
     <script type="text/javascript">
-        var nodes = new vis.DataSet(""" + json.dumps(nodes) + """);
-        var edges = new vis.DataSet(""" + json.dumps(edges) + """);
+        var nodes = new vis.DataSet(""")
+    dump_json(nodes, f)
+    f.write(""");
+        var edges = new vis.DataSet(""")
+    dump_json(edges, f)
+    f.write(""");
         
         var container = document.getElementById('network');
         var data = { nodes: nodes, edges: edges };
@@ -594,38 +621,46 @@ def generate_disease_association_network(shared_genes, output_dir):
         var network = new vis.Network(container, data, options);
     </script>
 </body>
-</html>"""
-    
-    filename = os.path.join(output_dir, 'multi_metal_network.html')
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write(html)
-    print(f"Saved: {filename}")
-    
-    return filename
-
-
-def generate_summary_report(output_dir):
-    """生成分析报告"""
-    
-    similarity_df = calculate_metal_similarity()
-    shared_genes = find_shared_genes()
-    summary_df = build_comparative_table()
-    
-    # 保存CSV
-    similarity_df.to_csv(os.path.join(output_dir, 'metal_similarity.csv'))
-    summary_df.to_csv(os.path.join(output_dir, 'metal_comparison.csv'), index=False)
+</html>""")
+
+
+def generate_summary_report(output_dir, similarity_df=None, shared_genes=None, summary_df=None):
+    """生成分析报告 (未传入的结果才重新计算)"""
+    
+    if similarity_df is None:
+        similarity_df = calculate_metal_similarity()
+    if shared_genes is None:
+        shared_genes = find_shared_genes()
+    if summary_df is None:
+        summary_df = build_comparative_table()
+    
+    # 保存CSV (表格很小, 直接用 csv 模块写出, 不经过 pandas 的 CSV 格式化)
+    with open(os.path.join(output_dir, 'metal_similarity.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow([''] + list(similarity_df.columns))
+        for metal, row in zip(similarity_df.index, similarity_df.to_numpy().tolist()):
+            writer.writerow([metal] + row)
+    with open(os.path.join(output_dir, 'metal_comparison.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(summary_df.columns)
+        writer.writerows(summary_df.itertuples(index=False, name=None))
     
     # 保存共享基因
-    with open(os.path.join(output_dir, 'shared_genes.json'), 'w') as f:
-        json.dump(shared_genes, f, indent=2)
-    
-    # 生成可视化
-    generate_similarity_heatmap(similarity_df, output_dir)
-    generate_pathway_comparison(output_dir)
-    generate_disease_association_network(shared_genes, output_dir)
-    
-    # 生成文字报告
-    report = f"""
+    with open(os.path.join(output_dir, 'shared_genes.json'), 'w', encoding='utf-8') as f:
+        dump_json(shared_genes, f, indent=True)
+    
+    # 生成可视化: 三张图互不依赖, 在进程池中并行渲染
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(generate_similarity_heatmap, similarity_df, output_dir),
+            executor.submit(generate_pathway_comparison, output_dir),
+            executor.submit(generate_disease_association_network, shared_genes, output_dir),
+        ]
+        for future in futures:
+            future.result()
+    
+    # 生成文字报告 (片段收集到列表, 最后一次拼接)
+    parts = [f"""
 # 多种重金属网络毒理学对比分析报告
 ## Multi-Metal Network Toxicology Comparative Analysis
 
@@ -648,7 +683,7 @@ def generate_summary_report(output_dir):
 
 | 金属 | 符号 | 靶点基因数 | 主要通路 | 主要疾病 |
 |------|------|-----------|---------|---------|
-"""
+"""]
     
     for metal, info in METALS.items():
         pathways = METAL_PATHWAYS.get(metal, [])
@@ -657,44 +692,44 @@ def generate_summary_report(output_dir):
         top_dis = diseases[0][0] if diseases else 'N/A'
         gene_count = len(METAL_GENES.get(metal, []))
         
-        report += f"| {info['name']} | {info['symbol']} | {gene_count} | {top_pw} | {top_dis} |\n"
+        parts.append(f"| {info['name']} | {info['symbol']} | {gene_count} | {top_pw} | {top_dis} |\n")
     
-    report += f"""
+    parts.append(f"""
 ---
 
 ## 3. 跨金属基因分析
 
 ### 3.1 全部金属共享基因 ({len(shared_genes.get('All-Metals', []))}个)
-"""
+""")
     
     if shared_genes.get('All-Metals'):
-        report += ", ".join(shared_genes['All-Metals']) + "\n\n"
+        parts.append(", ".join(shared_genes['All-Metals']) + "\n\n")
     else:
-        report += "无\n\n"
+        parts.append("无\n\n")
     
-    report += """### 3.2 两两金属共享基因
-"""
+    parts.append("""### 3.2 两两金属共享基因
+""")
     
     for pair, genes in shared_genes.items():
         if pair != 'All-Metals':
-            report += f"- **{pair}**: {', '.join(genes[:10])}{'...' if len(genes) > 10 else ''}\n"
+            parts.append(f"- **{pair}**: {', '.join(genes[:10])}{'...' if len(genes) > 10 else ''}\n")
     
-    report += f"""
+    parts.append(f"""
 ---
 
 ## 4. 相似性矩阵 (Jaccard Similarity)
 
 |  | Pb | As | Cd | Hg | Mn |
 |---|----|----|----|----|---|
-"""
+""")
     
     for metal in METALS.keys():
         row = f"| {metal[:2]} |"
         for m in METALS.keys():
             row += f" {similarity_df.loc[metal, m]:.2f} |"
-        report += row + "\n"
+        parts.append(row + "\n")
     
-    report += """
+    parts.append("""
 ---
 
 ## 5. 关键发现
@@ -715,11 +750,11 @@ def generate_summary_report(output_dir):
 ---
 
 *Generated by Multi-Metal Network Toxicology Analysis*
-"""
+""")
     
     report_file = os.path.join(output_dir, 'multi_metal_analysis_report.md')
     with open(report_file, 'w', encoding='utf-8') as f:
-        f.write(report)
+        f.write("".join(parts))
     print(f"Saved: {report_file}")
     
     return report_file
@@ -753,7 +788,7 @@ def main():
     
     # 4. 生成报告和可视化
     print("\n📈 生成可视化图表和报告...")
-    report_file = generate_summary_report(OUTPUT_DIR)
+    report_file = generate_summary_report(OUTPUT_DIR, similarity_df, shared_genes, summary_df)
     
     print("\n" + "=" * 60)
     print("✅ 分析完成!")
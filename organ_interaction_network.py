@@ -110,49 +110,25 @@ def build_organ_network():
     return G
 
 # ============= 计算器官健康评分 =============
+ORGAN_METRICS = {
+    'Heart': ['HR', 'SBP', 'DBP', 'EF'],      # 心血管评分 (归一化)
+    'Liver': ['ALT', 'AST', 'ALB'],           # 肝脏评分
+    'Spleen': ['WBC', 'PLT', 'LYM'],          # 脾脏/免疫评分
+    'Lung': ['FEV1', 'FVC', 'FEV1_FVC'],      # 肺评分
+    'Kidney': ['BUN', 'CREA', 'eGFR'],        # 肾脏评分
+}
+
 def calculate_organ_scores(df):
-    """计算各器官健康评分"""
+    """计算各器官健康评分 (直接在 numpy 数组上做 min-max 归一化，不复制子表)"""
     
     scores = {}
+    for organ, metrics in ORGAN_METRICS.items():
+        values = df[metrics].to_numpy(dtype=float)
+        lo = np.nanmin(values, axis=0)
+        span = np.nanmax(values, axis=0) - lo
+        scores[organ] = 1 - np.nanmean((values - lo) / span, axis=1)
     
-    # 心血管评分 (归一化)
-    heart_metrics = ['HR', 'SBP', 'DBP', 'EF']
-    heart_data = df[heart_metrics].copy()
-    for col in heart_metrics:
-        heart_data[col] = (heart_data[col] - heart_data[col].min()) / (heart_data[col].max() - heart_data[col].min())
-    scores['Heart'] = 1 - heart_data.mean(axis=1)
-    
-    # 肝脏评分
-    liver_metrics = ['ALT', 'AST', 'ALB']
-    liver_data = df[liver_metrics].copy()
-    for col in ['ALT', 'AST']:
-        liver_data[col] = (liver_data[col] - liver_data[col].min()) / (liver_data[col].max() - liver_data[col].min())
-    liver_data['ALB'] = (liver_data['ALB'] - liver_data['ALB'].min()) / (liver_data['ALB'].max() - liver_data['ALB'].min())
-    scores['Liver'] = 1 - liver_data.mean(axis=1)
-    
-    # 脾脏/免疫评分
-    spleen_metrics = ['WBC', 'PLT', 'LYM']
-    spleen_data = df[spleen_metrics].copy()
-    for col in spleen_metrics:
-        spleen_data[col] = (spleen_data[col] - spleen_data[col].min()) / (spleen_data[col].max() - spleen_data[col].min())
-    scores['Spleen'] = 1 - spleen_data.mean(axis=1)
-    
-    # 肺评分
-    lung_metrics = ['FEV1', 'FVC', 'FEV1_FVC']
-    lung_data = df[lung_metrics].copy()
-    for col in lung_metrics:
-        lung_data[col] = (lung_data[col] - lung_data[col].min()) / (lung_data[col].max() - lung_data[col].min())
-    scores['Lung'] = 1 - lung_data.mean(axis=1)
-    
-    # 肾脏评分
-    kidney_metrics = ['BUN', 'CREA', 'eGFR']
-    kidney_data = df[kidney_metrics].copy()
-    for col in ['BUN', 'CREA']:
-        kidney_data[col] = (kidney_data[col] - kidney_data[col].min()) / (kidney_data[col].max() - kidney_data[col].min())
-    kidney_data['eGFR'] = (kidney_data['eGFR'] - kidney_data['eGFR'].min()) / (kidney_data['eGFR'].max() - kidney_data['eGFR'].min())
-    scores['Kidney'] = 1 - kidney_data.mean(axis=1)
-    
-    return pd.DataFrame(scores)
+    return pd.DataFrame(scores, index=df.index)
 
 # ============= 网络扰动分析 =============
 def network_perturbation_analysis(df, G):
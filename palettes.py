@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared Color Palettes
+Single source of the palettes used by figure_generator and figure_style
+
+Usage:
+    from palettes import LEAD_PALETTE, TOL_BRIGHT
+"""
+
+# ============================================================================
+# PAUL TOL'S COLOR SCHEMES (Scientific Standard)
+# ============================================================================
+
+# Bright scheme - for qualitative categories (most distinguishable)
+TOL_BRIGHT = (
+    '#4477AA',  # Blue
+    '#EE6677',  # Red  
+    '#228833',  # Green
+    '#CCBB44',  # Yellow
+    '#66CCEE',  # Cyan
+    '#AA3377',  # Purple
+    '#BBBBBB',  # Grey
+)
+
+# Muted scheme - for when brightness needs to be reduced
+TOL_MUTED = (
+    '#117733',  # Green
+    '#88CCEE',  # Cyan
+    '#44AA99',  # Teal
+    '#999933',  # Olive
+    '#882255',  # Ruby
+    '#AA66CC',  # Purple
+    '#DD7788',  # Pink
+)
+
+# Medium contrast scheme
+TOL_MEDIUM = (
+    '#332288',  # Indigo
+    '#88Ccee',  # Cyan
+    '#44AA99',  # Teal
+    '#117733',  # Green
+    '#999933',  # Olive
+    '#DD7788',  # Pink
+    '#8877AA',  # Lavender
+)
+
+# Dark blue scheme
+TOL_DARK_BLUE = (
+    '#001c7f', '#140e3a', '#b1400d', '#12711b', '#8c08ac'
+)
+
+# Colorblind-friendly palette (Wong)
+COLORBLIND_SAFE = (
+    '#E69F00',  # Orange
+    '#56B4E9',  # Sky Blue
+    '#009E73',  # Bluish Green
+    '#F0E442',  # Yellow
+    '#0072B2',  # Blue
+    '#D55E00',  # Vermillion
+    '#CC79A7',  # Reddish Purple
+)
+
+# ============================================================================
+# CUSTOM PROFESSIONAL PALETTES
+# ============================================================================
+
+# Lead research theme - sophisticated blues
+LEAD_PALETTE = {
+    'primary': '#1a5276',      # Deep blue
+    'secondary': '#2980b9',    # Blue
+    'accent': '#e74c3c',       # Red (for lead/important)
+    'neutral': '#7f8c8d',      # Grey
+    'light': '#ebf5fb',        # Light blue
+    'dark': '#0a2540',         # Dark navy
+    'highlight': '#f39c12',    # Gold/amber
+    'success': '#27ae60',      # Green
+    'gradient': ('#0a2540', '#1a5276', '#2980b9', '#5dade2', '#aed6f1'),
+}
+
+# CKM syndrome stages
+CKM_STAGES = {
+    0: '#27ae60',   # Green - healthy
+    1: '#f1c40f',   # Yellow - risk
+    2: '#e67e22',   # Orange - disease
+    3: '#e74c3c',   # Red - severe
+    4: '#8e44ad',   # Purple - critical
+}
+
+# Nature-style palette
+NATURE_PALETTE = {
+    'blue': '#3B4992',
+    'red': '#EE0000',
+    'green': '#008B45',
+    'orange': '#FF8C00',
+    'purple': '#800080',
+    'grey': '#808080',
+}
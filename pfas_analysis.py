@@ -30,6 +30,8 @@ import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 from matplotlib import rcParams
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
 import seaborn as sns
 
 # 设置字体
@@ -428,18 +430,20 @@ def visualize_disease_network(disease_results):
     diseases = list(DISEASE_ASSOCIATIONS.keys())
     pfas_list = list(PFAS_TARGET_GENES.keys())
     
-    # 计算每种PFAS的疾病关联强度
-    network_data = []
-    for pfas in pfas_list:
+    # 计算每种PFAS的疾病关联强度 (边以并列数组存储: PFAS索引、疾病索引、重叠数)
+    edge_pfas = []
+    edge_disease = []
+    edge_count = []
+    for i, pfas in enumerate(pfas_list):
         pfas_diseases = disease_results.get(pfas, {})
-        for disease in diseases:
+        for j, disease in enumerate(diseases):
             if disease in pfas_diseases:
-                count = pfas_diseases[disease]['overlap_count']
-                network_data.append({
-                    'pfas': pfas,
-                    'disease': disease,
-                    'count': count
-                })
+                edge_pfas.append(i)
+                edge_disease.append(j)
+                edge_count.append(pfas_diseases[disease]['overlap_count'])
+    edge_pfas = np.asarray(edge_pfas, dtype=np.intp)
+    edge_disease = np.asarray(edge_disease, dtype=np.intp)
+    edge_count = np.asarray(edge_count, dtype=float)
     
     # 绘制网络风格图
     n_diseases = len(diseases)
@@ -449,42 +453,36 @@ def visualize_disease_network(disease_results):
     disease_angles = np.linspace(0, 2*np.pi, n_diseases, endpoint=False)
     pfas_angles = np.linspace(0, 2*np.pi, n_pfas, endpoint=False)
     
-    # 绘制连接线
-    for data in network_data:
-        pfas_idx = pfas_list.index(data['pfas'])
-        disease_idx = diseases.index(data['disease'])
-        
-        pfas_x = 0.5 * np.cos(pfas_angles[pfas_idx])
-        pfas_y = 0.5 * np.sin(pfas_angles[pfas_idx])
-        disease_x = 1.0 * np.cos(disease_angles[disease_idx])
-        disease_y = 1.0 * np.sin(disease_angles[disease_idx])
-        
-        alpha = min(0.3 + data['count'] * 0.15, 0.8)
-        linewidth = data['count']
-        
-        ax.plot([pfas_x, disease_x], [pfas_y, disease_y],
-                color=PFAS_COMPOUNDS[data['pfas']]['color'],
-                alpha=alpha, linewidth=linewidth, zorder=1)
-    
-    # 绘制PFAS节点
-    for i, pfas in enumerate(pfas_list):
-        x = 0.5 * np.cos(pfas_angles[i])
-        y = 0.5 * np.sin(pfas_angles[i])
-        ax.scatter(x, y, s=500, c=PFAS_COMPOUNDS[pfas]['color'], 
-                  zorder=2, edgecolors='white', linewidths=2)
+    # 节点坐标一次性计算，连线与节点共用
+    pfas_xy = 0.5 * np.column_stack([np.cos(pfas_angles), np.sin(pfas_angles)])
+    disease_xy = 1.0 * np.column_stack([np.cos(disease_angles), np.sin(disease_angles)])
+    
+    # 绘制连接线 (所有边合并为一个 LineCollection)
+    if edge_count.size:
+        starts = pfas_xy[edge_pfas]
+        ends = disease_xy[edge_disease]
+        edge_colors = to_rgba_array([PFAS_COMPOUNDS[pfas]['color'] for pfas in pfas_list])[edge_pfas]
+        edge_colors[:, 3] = np.minimum(0.3 + edge_count * 0.15, 0.8)
+        ax.add_collection(LineCollection(np.stack([starts, ends], axis=1),
+                                         colors=edge_colors, linewidths=edge_count,
+                                         zorder=1))
+    
+    # 绘制PFAS节点 (每圈节点一次 scatter 调用)
+    ax.scatter(pfas_xy[:, 0], pfas_xy[:, 1], s=500,
+              c=[PFAS_COMPOUNDS[pfas]['color'] for pfas in pfas_list],
+              zorder=2, edgecolors='white', linewidths=2)
+    for (x, y), pfas in zip(pfas_xy, pfas_list):
         ax.text(x, y, pfas, ha='center', va='center', 
                fontsize=10, fontweight='bold', color='white')
     
     # 绘制疾病节点
-    for i, disease in enumerate(diseases):
-        x = 1.0 * np.cos(disease_angles[i])
-        y = 1.0 * np.sin(disease_angles[i])
-        ax.scatter(x, y, s=300, c='#34495E', zorder=2,
-                  edgecolors='white', linewidths=2)
-        # 旋转标签
-        angle = np.degrees(disease_angles[i])
-        ha = 'left' if -90 <= angle <= 90 else 'right'
-        ax.text(x*1.1, y*1.1, disease, ha=ha, va='center', 
+    ax.scatter(disease_xy[:, 0], disease_xy[:, 1], s=300, c='#34495E', zorder=2,
+              edgecolors='white', linewidths=2)
+    # 旋转标签
+    label_angles = np.degrees(disease_angles)
+    label_ha = np.where(label_angles <= 90, 'left', 'right')
+    for (x, y), disease, angle, ha in zip(disease_xy * 1.1, diseases, label_angles, label_ha):
+        ax.text(x, y, disease, ha=ha, va='center', 
                fontsize=8, rotation=angle)
     
     ax.set_xlim(-1.4, 1.4)
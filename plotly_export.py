@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+铅网络毒理学 - Plotly 静态图导出
+Lead Network Toxicology - Plotly Static Export
+
+一次启动 Kaleido 渲染多张图，避免每次 write_image 都重新启动浏览器；
+HTML 序列化放到进程池中，不阻塞后续图形构建。
+
+用法:
+    from plotly_export import save_static_batch, HtmlWriter
+    save_static_batch([fig1, fig2], ['a.png', 'b.png'], scale=2)
+
+    with HtmlWriter() as writer:
+        writer.submit(fig1, "a.html")
+"""
+
+import plotly.io as pio
+
+
+def save_static_batch(figs, paths, scale=2):
+    """批量导出静态图 (PNG/PDF/SVG 由文件扩展名决定)"""
+    figs = list(figs)
+    paths = [str(p) for p in paths]
+    if len(figs) != len(paths):
+        raise ValueError("figs 与 paths 数量不一致")
+
+    if hasattr(pio, 'write_images'):
+        # plotly >= 6.1: 所有图共用一个 Kaleido 会话
+        pio.write_images(figs, paths, scale=scale)
+    else:
+        for fig, path in zip(figs, paths):
+            fig.write_image(path, scale=scale)
+
+    return paths
+
+
+def _write_html_worker(fig_dict, path):
+    """子进程: 由 dict 重建图形并写出 HTML"""
+    import plotly.graph_objects as go
+    pio.write_html(go.Figure(fig_dict), path)
+    return path
+
+
+class HtmlWriter:
+    """在进程池中写 HTML，主进程提交后立即继续构建下一张图 (singlecore=True 时同步写出)"""
+
+    def __init__(self, singlecore=False, max_workers=None):
+        self.singlecore = singlecore
+        self.max_workers = max_workers
+        self._pool = None
+        self._futures = []
+
+    def __enter__(self):
+        if not self.singlecore:
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self
+
+    def submit(self, fig, path):
+        path = str(path)
+        if self._pool is None:
+            fig.write_html(path)
+        else:
+            self._futures.append(self._pool.submit(_write_html_worker, fig.to_dict(), path))
+        return path
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            if exc_type is None:
+                # 抛出子进程中的写入错误
+                for future in self._futures:
+                    future.result()
+        return False
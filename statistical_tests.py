@@ -20,6 +20,7 @@ import os
 import numpy as np
 import pandas as pd
 from scipy import stats
+from scipy.linalg import solve_triangular
 from scipy.stats import spearmanr, pearsonr, ttest_ind, mannwhitneyu, kruskal
 from itertools import combinations
 from collections import defaultdict
@@ -121,6 +122,58 @@ def correlation_matrix_with_stats(df, columns, method='pearson', alpha=0.05):
     return r_df, p_df, n_df
 
 
+def spearman_against(df, ref_col, columns):
+    """
+    参考列与多列的 Spearman 相关（成对删除缺失值）
+
+    无缺失的列与参考列一次性排秩，并以矩阵乘法计算秩的 Pearson 相关；
+    有缺失的列按各自的有效样本屏蔽后整体按列排秩，不逐列循环。p 值使用与 spearmanr 相同的 t 分布近似。
+
+    Args:
+        df: 数据框
+        ref_col: 参考列 (如 'Blood_Lead')
+        columns: 待比较的列名列表
+
+    Returns:
+        DataFrame: index 为列名, 含 r, p_value, n
+    """
+    x = df[ref_col].to_numpy(dtype=float)
+    Y = df[columns].to_numpy(dtype=float)
+    valid = ~np.isnan(Y) & ~np.isnan(x)[:, None]
+    n = valid.sum(axis=0)
+    r = np.full(len(columns), np.nan)
+
+    # 与参考列同时完整的列: 共享同一组行, 排秩一次
+    full = valid.all(axis=0)
+    if full.any():
+        xc = stats.rankdata(x)
+        xc -= xc.mean()
+        Yc = stats.rankdata(Y[:, full], axis=0)
+        Yc -= Yc.mean(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r[full] = (xc @ Yc) / np.sqrt((xc @ xc) * np.einsum('ij,ij->j', Yc, Yc))
+
+    # 有缺失的列: 参考列按各列的有效行分别屏蔽后, 两侧各一次按列排秩 (缺失处秩为 NaN)
+    partial = ~full & (n >= 3)
+    if partial.any():
+        mask = valid[:, partial]
+        Xc = stats.rankdata(np.where(mask, x[:, None], np.nan), axis=0, nan_policy='omit')
+        Yc = stats.rankdata(np.where(mask, Y[:, partial], np.nan), axis=0, nan_policy='omit')
+        Xc = np.where(mask, Xc - np.nanmean(Xc, axis=0), 0.0)
+        Yc = np.where(mask, Yc - np.nanmean(Yc, axis=0), 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r[partial] = (np.einsum('ij,ij->j', Xc, Yc)
+                          / np.sqrt(np.einsum('ij,ij->j', Xc, Xc) * np.einsum('ij,ij->j', Yc, Yc)))
+
+    r = np.clip(r, -1.0, 1.0)
+    dof = n - 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = r * np.sqrt(dof / ((1.0 - r) * (1.0 + r)))
+    p_value = 2 * stats.t.sf(np.abs(t), dof)
+
+    return pd.DataFrame({'r': r, 'p_value': p_value, 'n': n}, index=columns)
+
+
 def multiple_correlation_correction(p_values, method='bonferroni'):
     """
     多重比较校正
@@ -306,6 +359,57 @@ def simple_regression_with_stats(x, y):
     }
 
 
+def linear_fits(x, Y):
+    """
+    x 对 Y 各列的一元线性拟合 (中心化闭式解)
+
+    与逐列 np.polyfit(x, y, 1) / np.corrcoef 等价，不经过 lstsq；
+    先中心化再求叉积，避免原始和公式 n·Σxy - Σx·Σy 的相消误差。
+
+    Args:
+        x: 自变量 (一维数组)
+        Y: 因变量矩阵，每列一个结局
+
+    Returns:
+        tuple: (slopes, intercepts, pearson_r)，每列一个元素
+    """
+    x_mean = x.mean()
+    x_centered = x - x_mean
+    x_ss = x_centered @ x_centered
+    Y_mean = Y.mean(axis=0)
+    Y_centered = Y - Y_mean
+    sxy = x_centered @ Y_centered
+    slopes = sxy / x_ss
+    r = sxy / np.sqrt(x_ss * np.einsum('ij,ij->j', Y_centered, Y_centered))
+    return slopes, Y_mean - slopes * x_mean, r
+
+
+def ols_from_qr(r, qty, yty, n):
+    """
+    由设计矩阵 Z = QR 的 R 因子求 OLS 系数及 t 检验 (不显式求逆)
+
+    同一 Z 上的多个回归共用一次 QR 分解，每个回归只需 Qᵀy 与 yᵀy；
+    由 Z 前 k 列构成的子模型直接取 R[:k, :k] 与 Qᵀy 的前 k 项。
+
+    Args:
+        r: 上三角 R 因子
+        qty: Qᵀy
+        yty: yᵀy
+        n: 样本量
+
+    Returns:
+        tuple: (beta, se, p_value)，均为与 R 列数等长的数组
+    """
+    beta = solve_triangular(r, qty)
+    dof = n - len(beta)
+    mse = (yty - qty @ qty) / dof
+    # diag((RᵀR)⁻¹) 为 R⁻¹ 各行的平方和
+    r_inv = solve_triangular(r, np.eye(len(beta)))
+    se = np.sqrt(mse * np.einsum('ij,ij->i', r_inv, r_inv))
+    p_value = 2 * stats.t.sf(np.abs(beta / se), dof)
+    return beta, se, p_value
+
+
 def dose_response_analysis(df, exposure_col, outcome_col, n_groups=4):
     """
     剂量-效应关系分析
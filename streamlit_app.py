@@ -192,6 +192,35 @@ def train_model(X_train, y_train, model_type, random_state=42):
     
     return model, use_scaled
 
+@st.cache_resource
+def _risk_gauge_template():
+    """综合风险仪表盘模板 (每个进程只构建一次, 只读)"""
+    return go.Figure(go.Indicator(
+        mode = "gauge+number",
+        value = 0,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "综合风险评分 (%)"},
+        gauge = {
+            'axis': {'range': [0, 100]},
+            'bar': {'color': "darkred"},
+            'steps': [
+                {'range': [0, 25], 'color': "lightgreen"},
+                {'range': [25, 50], 'color': "lightyellow"},
+                {'range': [50, 75], 'color': "orange"},
+                {'range': [75, 100], 'color': "lightcoral"}
+            ],
+        }
+    ))
+
+def update_risk_gauge(avg_risk):
+    """复用缓存的仪表盘模板，每次重绘只更新数值
+
+    缓存的 Figure 由所有会话共享，先复制一份再修改，避免并发会话互相覆盖数值。
+    """
+    fig = go.Figure(_risk_gauge_template())
+    fig.update_traces(value=avg_risk * 100)
+    return fig
+
 # ============================================================
 # 侧边栏
 # ============================================================
@@ -702,7 +731,9 @@ elif page == "🔮 风险预测":
         st.markdown("### 🎯 预测结果")
         
         # 显示风险等级
-        avg_risk = np.mean(list(results.values()))
+        model_names = list(results)
+        model_probs = np.fromiter(results.values(), dtype=float, count=len(results))
+        avg_risk = model_probs.mean()
         
         if avg_risk < 0.25:
             risk_level = "🟢 低风险"
@@ -723,29 +754,15 @@ elif page == "🔮 风险预测":
         # 各模型预测对比
         st.markdown("### 各模型预测值")
         
-        model_results = pd.DataFrame([
-            {'模型': name, '风险概率': f"{prob*100:.1f}%", '风险等级': '高' if prob > 0.5 else '低'}
-            for name, prob in results.items()
-        ])
+        model_results = pd.DataFrame({
+            '模型': model_names,
+            '风险概率': np.char.mod('%.1f%%', model_probs * 100),
+            '风险等级': np.where(model_probs > 0.5, '高', '低')
+        })
         st.dataframe(model_results, use_container_width=True)
         
         # 风险仪表盘
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number",
-            value = avg_risk * 100,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "综合风险评分 (%)"},
-            gauge = {
-                'axis': {'range': [0, 100]},
-                'bar': {'color': "darkred"},
-                'steps': [
-                    {'range': [0, 25], 'color': "lightgreen"},
-                    {'range': [25, 50], 'color': "lightyellow"},
-                    {'range': [50, 75], 'color': "orange"},
-                    {'range': [75, 100], 'color': "lightcoral"}
-                ],
-            }
-        ))
+        fig = update_risk_gauge(avg_risk)
         
         st.plotly_chart(fig, use_container_width=True)
         